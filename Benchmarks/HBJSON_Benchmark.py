@@ -0,0 +1,215 @@
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Transcoder"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "BlenderAddon"))
+
+from HBJSON_Trasncoder import HoudiniPointCacheLoaderBJSON, HoudiniPointCacheSaverBJSON, convert_file
+
+try:
+    from HBJSON_Generator import HBJsonGenerator
+except ImportError:
+    # The addon's generator needs NumPy
+    HBJsonGenerator = None
+
+INT32 = ord(b'l')
+FLOAT32 = ord(b'f')
+
+# name: (attrib_name, attrib_size, attrib_data_type)
+LAYOUTS = {
+    "addon": (
+        ["id", "InitialSpriteSizeX", "InitialSpriteSizeY", "Alpha", "Color", "class", "pscale", "CameraOffset", "Age", "age",
+         "P", "DynamicMaterialParameterW", "Life", "DynamicMaterialParameterX", "Cd", "DynamicMaterialParameterY",
+         "DynamicMaterialParameterZ", "hitnormal", "aligntosurface", "MaterialOption"],
+        [1, 1, 1, 1, 3, 1, 1, 1, 1, 1, 3, 1, 1, 1, 3, 1, 1, 3, 1, 1],
+        [INT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, INT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32,
+         FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32, FLOAT32,
+         FLOAT32, INT32, INT32],
+    ),
+    "minimal": (["id", "P"], [1, 3], [INT32, FLOAT32]),
+    "wide": (
+        ["id"] + [f"attrib{i}" for i in range(31)],
+        [1] + [3] * 31,
+        [INT32] + [FLOAT32] * 31,
+    ),
+}
+
+def generate_cache(layout, num_points, num_frames, seed=0):
+    attrib_name, attrib_size, attrib_data_type = LAYOUTS[layout]
+    rng = random.Random(seed)
+    frames = []
+    for number in range(num_frames):
+        frame_data = []
+        for i in range(num_points):
+            point = []
+            for size, data_type in zip(attrib_size, attrib_data_type):
+                if data_type == INT32:
+                    point.append([i] * size)
+                else:
+                    point.append([rng.uniform(-1000.0, 1000.0) for _ in range(size)])
+            frame_data.append(point)
+        frames.append({"number": number, "time": number, "num_points": num_points, "frame_data": frame_data})
+
+    return {
+        "header": {
+            "version": "1.0",
+            "num_samples": num_points,
+            "num_frames": num_frames,
+            "num_points": num_points,
+            "num_attrib": len(attrib_name),
+            "attrib_name": attrib_name,
+            "attrib_size": attrib_size,
+            "attrib_data_type": attrib_data_type,
+            "data_type": "linear"
+        },
+        "cache_data": {"frames": frames}
+    }
+
+def generate_addon_input(num_points, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "location": [rng.uniform(-100.0, 100.0) for _ in range(3)],
+            "dimensions": [rng.uniform(0.1, 10.0) for _ in range(3)],
+            "normal": [0.0, 0.0, 1.0],
+        }
+        for _ in range(num_points)
+    ]
+
+def measure(function, repeat, trace_memory):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    peak = None
+    if trace_memory:
+        # Traced separately, tracemalloc slows down the run it observes
+        gc.collect()
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(timings), peak
+
+def run_case(layout, num_points, num_frames, work_dir, repeat, trace_memory):
+    data = generate_cache(layout, num_points, num_frames)
+    name = f"{layout}_{num_points}x{num_frames}"
+    hbjson_path = os.path.join(work_dir, name + ".hbjson")
+    json_path = os.path.join(work_dir, name + ".json")
+    HoudiniPointCacheSaverBJSON(data, hbjson_path).save()
+
+    def hbjson_to_json():
+        with contextlib.redirect_stdout(None):
+            convert_file(hbjson_path)
+
+    def json_to_hbjson():
+        with contextlib.redirect_stdout(None):
+            convert_file(json_path)
+
+    operations = [
+        ("load", lambda: HoudiniPointCacheLoaderBJSON(hbjson_path).load(), hbjson_path),
+        ("save", lambda: HoudiniPointCacheSaverBJSON(data, hbjson_path).save(), hbjson_path),
+        ("hbjson_to_json", hbjson_to_json, hbjson_path),
+        ("json_to_hbjson", json_to_hbjson, json_path),
+    ]
+    if layout == "addon" and num_frames == 1 and HBJsonGenerator is not None:
+        addon_input = generate_addon_input(num_points)
+        locations = [point["location"] for point in addon_input]
+        dimensions = [point["dimensions"] for point in addon_input]
+        normals = [point["normal"] for point in addon_input]
+        operations.append(("generate_json", lambda: HBJsonGenerator().generate_json(addon_input), None))
+        operations.append(("generate_packed", lambda: HBJsonGenerator().generate_packed(locations, dimensions, normals), None))
+
+    results = []
+    for operation, function, sized_path in operations:
+        seconds, peak = measure(function, repeat, trace_memory)
+        size = os.path.getsize(sized_path) if sized_path else 0
+        results.append({
+            "case": name,
+            "operation": operation,
+            "layout": layout,
+            "points": num_points,
+            "frames": num_frames,
+            "seconds": seconds,
+            "bytes": size,
+            "mb_per_s": size / seconds / 1e6 if seconds and size else None,
+            "points_per_s": num_points * num_frames / seconds if seconds else None,
+            "peak_memory": peak,
+        })
+    return results
+
+def compare_results(results, baseline, threshold):
+    previous = {(entry["case"], entry["operation"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["case"], entry["operation"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = entry["seconds"] / old["seconds"]
+        entry["ratio"] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append(entry)
+    return regressions
+
+def print_results(results):
+    print(f"{'case':<24} {'operation':<16} {'seconds':>9} {'MB/s':>9} {'points/s':>12} {'peak MB':>9} {'ratio':>7}")
+    for entry in results:
+        mb_per_s = f"{entry['mb_per_s']:.1f}" if entry["mb_per_s"] else "-"
+        points_per_s = f"{entry['points_per_s']:.0f}" if entry["points_per_s"] else "-"
+        peak = f"{entry['peak_memory'] / 1e6:.1f}" if entry["peak_memory"] is not None else "-"
+        ratio = f"{entry['ratio']:.2f}" if "ratio" in entry else "-"
+        print(f"{entry['case']:<24} {entry['operation']:<16} {entry['seconds']:>9.4f} {mb_per_s:>9} {points_per_s:>12} {peak:>9} {ratio:>7}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HBJSON loader, saver and converters on synthetic point caches.")
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--frames", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=["addon", "minimal"])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation, the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory run")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if HBJsonGenerator is None:
+        print("NumPy is not available, the addon's generator is not benchmarked.")
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for layout in args.layouts:
+            for num_points in args.points:
+                for num_frames in args.frames:
+                    results += run_case(layout, num_points, num_frames, work_dir, args.repeat, not args.no_memory)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            regressions = compare_results(results, json.load(file), args.threshold)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"python": sys.version, "created": time.time(), "results": results}, file, indent=4)
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for entry in regressions:
+            print(f"  {entry['case']} {entry['operation']}: {entry['ratio']:.2f}x slower")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,273 +1,259 @@
 bl_info = {
     "name": "Homeworld 3 - HBJSON Exporter",
-    "description": "Export engines, lights or vector thrusters in Houdini Point Cache format for HomeWorld3.",
-    "location": "File > Export > Houdini Point Cache (.hbjson)",
+    "description": "Export engines, lights or vector thrusters in Houdini Point Cache format for HomeWorld3, and import point caches as point clouds.",
+    "location": "File > Export > Houdini Point Cache (.hbjson), File > Import > Houdini Point Cache (.hbjson)",
     "warning": "",
     "doc_url": "https://github.com/HomeFleet-Development-Team/DT-EnginePointCacheToolset",
     "author": "Chokepoint Games, HomeFleet Development Team",
-    "version": (1, 3),
+    "version": (1, 4),
     "blender": (4, 2, 0),
     "category": "Import-Export",
 }
 
 import bpy
-import json
 import os
-import copy
-import struct
 import mathutils
 import numpy as np
-from collections import Counter
 
-class HBJsonGenerator:
+try:
+    from . import HBJSON_Codec
+    from . import HBJSON_Reader
+    from .HBJSON_Generator import HBJsonGenerator
+except ImportError:
+    import HBJSON_Codec
+    import HBJSON_Reader
+    from HBJSON_Generator import HBJsonGenerator
+
+def dominant_normal(normals, tolerance):
+    # normals is an (n, 3) array, normals closer than tolerance on every axis share one vote
+    if len(normals) == 0:
+        return mathutils.Vector((0.0, 0.0, 1.0))
+
+    keys = np.round(normals / tolerance).astype(np.int64) if tolerance > 0 else normals
+    _, first_index, inverse, counts = np.unique(keys, axis=0, return_index=True, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    # Ties go to the normal met first, as Counter.most_common did
+    best = np.flatnonzero(counts == counts.max())
+    winner = best[np.argmin(first_index[best])]
+    normal = mathutils.Vector(normals[inverse == winner].mean(axis=0))
+    normal.normalize()
+    return normal
+
+def mesh_loop_normals(mesh):
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    mesh.loops.foreach_get("normal", normals)
+    return normals.reshape(-1, 3)
+
+def mesh_vertex_coordinates(mesh):
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3)
+
+def object_matrices(objects):
+    # matrix_world of every object in a single read, foreach_get lays each matrix out column by column
+    matrices = np.empty(len(objects) * 16, dtype=np.float32)
+    objects.foreach_get("matrix_world", matrices)
+    return matrices.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+def object_vectors(objects, attribute):
+    values = np.empty(len(objects) * 3, dtype=np.float32)
+    objects.foreach_get(attribute, values)
+    return values.reshape(-1, 3)
+
+def sample_mesh(mesh, matrix, normal_tolerance):
+    # Same result as applying the transforms and setting the origin to the median, without touching the object
+    rotation_scale = matrix[:3, :3]
+
+    coordinates = mesh_vertex_coordinates(mesh) @ rotation_scale.T + matrix[:3, 3]
+    if len(coordinates):
+        # Blender's median center is the mean of the vertices
+        location = coordinates.mean(axis=0)
+        dimensions = coordinates.max(axis=0) - coordinates.min(axis=0)
+    else:
+        location = matrix[:3, 3]
+        dimensions = np.zeros(3)
+
+    normals = mesh_loop_normals(mesh) @ np.linalg.pinv(rotation_scale)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals /= np.where(lengths > 0.0, lengths, 1.0)
+
+    return location, dimensions, dominant_normal(normals, normal_tolerance)
+
+class SampleCache:
+    # Mesh samples kept between exports, an object is resampled only when its fingerprint changes
     def __init__(self):
-        self.template = {
-            "header": {
-                "version": "1.0",
-                "num_samples": 0,
-                "num_frames": 1,
-                "num_points": 0,
-                "num_attrib": 20,
-                "attrib_name": [
-                    "id",
-                    "InitialSpriteSizeX",
-                    "InitialSpriteSizeY",
-                    "Alpha",
-                    "Color",
-                    "class",
-                    "pscale",
-                    "CameraOffset",
-                    "Age",
-                    "age",
-                    "P",
-                    "DynamicMaterialParameterW",
-                    "Life",
-                    "DynamicMaterialParameterX",
-                    "Cd",
-                    "DynamicMaterialParameterY",
-                    "DynamicMaterialParameterZ",
-                    "hitnormal",
-                    "aligntosurface",
-                    "MaterialOption",
-                ],
-                "attrib_size": [
-                    1,
-                    1,
-                    1,
-                    1,
-                    3,
-                    1,
-                    1,
-                    1,
-                    1,
-                    1,
-                    3,
-                    1,
-                    1,
-                    1,
-                    3,
-                    1,
-                    1,
-                    3,
-                    1,
-                    1
-                ],
-                "attrib_data_type": [
-                    108,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    108,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    102,
-                    108,
-                    108
-                ],
-                "data_type": "linear"
-            },
-            "cache_data": {
-                "frames": [
-                    {
-                        "number": 0,
-                        "time": 0,
-                        "num_points": 0,
-                        "frame_data": []
-                    }
-                ]
-            }
-        }
-
-    def generate_json(self, input_data):
-        output = copy.deepcopy(self.template)
-        output["header"]["num_samples"] = len(input_data)
-        output["header"]["num_points"] = len(input_data)
-        output["cache_data"]["frames"][0]["num_points"] = len(input_data)
-
-        inputs_max_dimension = max([max(point["dimensions"]) for point in input_data])
-
-        frame_data = []
-        for i, point in enumerate(input_data):
-            location = point["location"]
-            dimensions = point["dimensions"]
-            normal = point["normal"]
-            max_dimension = max(dimensions)
-            sprite_size = max_dimension * 500
-            pscale = max_dimension / inputs_max_dimension
-
-            point_data = [
-                [i],  # id
-                [sprite_size],  # InitialSpriteSizeX
-                [sprite_size],  # InitialSpriteSizeY
-                [1.0],  # Alpha
-                [1.0, 1.0, 1.0],  # Color
-                [0.0],  # class
-                [pscale],  # pscale
-                [1073741824],  # CameraOffset
-                [0.0],  # Age
-                [0.0],  # age
-                location,  # P
-                [1.0],  # DynamicMaterialParameterW
-                [1.0],  # Life
-                [1.0],  # DynamicMaterialParameterX
-                [1.0, 1.0, 1.0],  # Cd
-                [1.0],  # DynamicMaterialParameterY
-                [1.0],  # DynamicMaterialParameterZ
-                normal,  # hitnormal
-                [1.401298464324817e-45],  # aligntosurface
-                [0.0]  # MaterialOption
-            ]
-
-            frame_data.append(point_data)
-
-        output["cache_data"]["frames"][0]["frame_data"] = frame_data
-        return output
-
-class ObjectMetaProperty(bpy.types.PropertyGroup):
-    location: bpy.props.FloatVectorProperty(name="Location", size=3)
-    dimensions: bpy.props.FloatVectorProperty(name="Dimensions", size=3)
-    normal: bpy.props.FloatVectorProperty(name="Normal", size=3)
-
-class HBJsonPropertyGroup(bpy.types.PropertyGroup):
-    json: bpy.props.StringProperty()
+        self.entries = {}
+        self.mesh_versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.mesh_versions.clear()
+
+    def mesh_updated(self, mesh):
+        self.mesh_versions[mesh.session_uid] = self.mesh_versions.get(mesh.session_uid, 0) + 1
+
+    def fingerprint(self, obj, matrix, normal_tolerance):
+        mesh = obj.data
+        return (
+            matrix.tobytes(),
+            mesh.as_pointer(),
+            self.mesh_versions.get(mesh.session_uid, 0),
+            len(mesh.vertices),
+            normal_tolerance,
+        )
+
+    def sample(self, obj, matrix, normal_tolerance):
+        fingerprint = self.fingerprint(obj, matrix, normal_tolerance)
+        entry = self.entries.get(obj.session_uid)
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        sample = sample_mesh(obj.data, matrix, normal_tolerance)
+        self.entries[obj.session_uid] = (fingerprint, sample)
+        return sample
+
+    def evict(self, objects, meshes):
+        # Drops the entries of deleted objects and meshes, returns how many samples were dropped
+        alive = {obj.session_uid for obj in objects}
+        stale = [key for key in self.entries if key not in alive]
+        for key in stale:
+            del self.entries[key]
+
+        alive = {mesh.session_uid for mesh in meshes}
+        for key in [key for key in self.mesh_versions if key not in alive]:
+            del self.mesh_versions[key]
+        return len(stale)
+
+sample_cache = SampleCache()
+
+@bpy.app.handlers.persistent
+def track_mesh_updates(scene, depsgraph):
+    # Geometry edits keep the mesh pointer, the version counted here tells them apart
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, bpy.types.Object):
+            data = data.data
+        if isinstance(data, bpy.types.Mesh):
+            sample_cache.mesh_updated(data)
+
+def sample_objects(objects, normal_tolerance, depsgraph=None, cache=None):
+    # With a depsgraph, meshes are sampled with their modifiers and deformations evaluated
+    matrices = object_matrices(objects)
+    object_locations = object_vectors(objects, "location")
+    object_scales = object_vectors(objects, "scale")
+
+    locations = []
+    dimensions = []
+    normals = []
+    ignored = []
+
+    for i, obj in enumerate(objects):
+        if obj.type == 'EMPTY':
+            # Local Z axis in world space
+            normal_vector = matrices[i, :3, 2]
+            length = np.linalg.norm(normal_vector)
+
+            locations.append(object_locations[i])
+            dimensions.append(object_scales[i])
+            normals.append(normal_vector / length if length > 0.0 else normal_vector)
+            continue
+
+        if obj.type == 'MESH':
+            if depsgraph is not None:
+                location, dimension, normal = sample_mesh(obj.evaluated_get(depsgraph).data, matrices[i], normal_tolerance)
+            elif cache is not None:
+                location, dimension, normal = cache.sample(obj, matrices[i], normal_tolerance)
+            else:
+                location, dimension, normal = sample_mesh(obj.data, matrices[i], normal_tolerance)
+
+            locations.append(location)
+            dimensions.append(dimension)
+            normals.append(normal)
+            continue
+        ignored.append(obj.name)
+
+    # float32, as the exported values are stored
+    return (
+        np.array(locations, dtype=np.float32).reshape(-1, 3),
+        np.array(dimensions, dtype=np.float32).reshape(-1, 3),
+        np.array(normals, dtype=np.float32).reshape(-1, 3),
+        ignored,
+    )
+
+# Export waiting for SaveHBJSONOperator, keyed by the handle passed between the two operators
+export_cache = {}
 
 class SaveHBJSONOperator(bpy.types.Operator):
     bl_idname = "wm.save_hbjson"
     bl_label = "Save Point Cache"
     
     filepath: bpy.props.StringProperty(subtype="FILE_PATH")
-
-    MarkerTypeChar = ord(b'c')
-    MarkerTypeInt8 = ord(b'b')
-    MarkerTypeUInt8 = ord(b'B')
-    MarkerTypeBool = ord(b'?')
-    MarkerTypeInt16 = ord(b'h')
-    MarkerTypeUInt16 = ord(b'H')
-    MarkerTypeInt32 = ord(b'l')
-    MarkerTypeUInt32 = ord(b'L')
-    MarkerTypeInt64 = ord(b'q')
-    MarkerTypeUInt64 = ord(b'Q')
-    MarkerTypeFloat32 = ord(b'f')
-    MarkerTypeFloat64 = ord(b'd')
-    MarkerTypeString = ord(b's')
-    MarkerObjectStart = ord(b'{')
-    MarkerObjectEnd = ord(b'}')
-    MarkerArrayStart = ord(b'[')
-    MarkerArrayEnd = ord(b']')
-
-    def write_marker(self, marker):
-            self.buffer.append(marker)
-
-    def write_uint8_string(self, string):
-        self.buffer.append(len(string))
-        self.buffer.extend(string.encode('utf-8'))
-
-    def write_uint32(self, value):
-        self.buffer.extend(struct.pack('I', value))
-
-    def write_uint16(self, value):
-        self.buffer.extend(struct.pack('H', value))
-
-    def write_list(self, list_data):
-        self.write_marker(self.MarkerArrayStart)
-        for item in list_data:
-            if isinstance(item, str):
-                self.write_marker(self.MarkerTypeUInt8)
-                self.write_uint8_string(item)
-            elif isinstance(item, dict):
-                self.write_marker(self.MarkerObjectStart)
-                self.write_object(item)
-                self.write_marker(self.MarkerObjectEnd)
-            elif isinstance(item, list):
-                self.write_list(item)
-            else:
-                self.write_marker(item)
-
-        self.write_marker(self.MarkerArrayEnd)
-
-    def write_object(self, obj):
-        for key, value in obj.items():
-            self.write_marker(self.MarkerTypeUInt8)
-            self.write_uint8_string(key)
-
-            if isinstance(value, int):
-                if key in ["num_samples", "num_frames", "num_points", "number", "time"]:
-                    self.write_uint32(value)
-                elif key in ["num_attrib"]:
-                    self.write_uint16(value)
-            elif isinstance(value, list):
-                if key == "frame_data":
-                    self.write_frames_data(value)
-                else:
-                    self.write_list(value)
-            elif isinstance(value, dict):
-                self.write_marker(self.MarkerObjectStart)
-                self.write_object(value)
-                self.write_marker(self.MarkerObjectEnd)
-            else:
-                self.write_marker(self.MarkerTypeUInt8)
-                self.write_uint8_string(str(value))
-
-    def write_frames_data(self, frames_data):
-        self.write_marker(self.MarkerArrayStart)
-        for frame in frames_data:
-            self.write_marker(self.MarkerArrayStart)
-            for attribute in frame:
-                if all(isinstance(i, int) for i in attribute):
-                    for item in attribute:
-                        self.buffer.extend(struct.pack('i', item))
-                elif all(isinstance(i, float) for i in attribute):
-                    for item in attribute:
-                        self.buffer.extend(struct.pack('f', item))
-            self.write_marker(self.MarkerArrayEnd)
-        self.write_marker(self.MarkerArrayEnd)
+    export_handle: bpy.props.StringProperty(options={'HIDDEN', 'SKIP_SAVE'})
+
+    export_animation: bpy.props.BoolProperty(
+        name="Export Animation",
+        description="Bake every frame of the range instead of the current frame only",
+        default=False,
+    )
+    frame_start: bpy.props.IntProperty(name="Start Frame", default=1)
+    frame_end: bpy.props.IntProperty(name="End Frame", default=250)
+    frame_step: bpy.props.IntProperty(name="Frame Step", default=1, min=1)
+
+    def sample_frames(self, context, collection, normal_tolerance):
+        scene = context.scene
+        fps = scene.render.fps / scene.render.fps_base
+        for number, frame in enumerate(range(self.frame_start, self.frame_end + 1, self.frame_step)):
+            scene.frame_set(frame)
+            locations, dimensions, normals, _ = sample_objects(collection.objects, normal_tolerance, context.evaluated_depsgraph_get())
+            # time is stored as an unsigned integer, in milliseconds from the first exported frame
+            yield number, round((frame - self.frame_start) / fps * 1000), locations, dimensions, normals
+
+    def save_animation(self, context, export):
+        collection = bpy.data.collections.get(export["collection"])
+        if collection is None:
+            self.report({'ERROR'}, f"Collection {export['collection']} no longer exists, run the export again.")
+            return {'CANCELLED'}
+
+        num_frames = len(range(self.frame_start, self.frame_end + 1, self.frame_step))
+        if num_frames == 0:
+            self.report({'ERROR'}, "The end frame is before the start frame.")
+            return {'CANCELLED'}
+
+        generator = HBJsonGenerator()
+        data_to_save = generator.header(len(export["points"][0]), num_frames)
+        # Frames are sampled while the encoder writes them, only one frame is held in memory
+        samples = self.sample_frames(context, collection, export["normal_tolerance"])
+        data_to_save["cache_data"]["frames"] = HBJSON_Codec.ArrayStream(generator.generate_frames(samples))
+
+        current_frame = context.scene.frame_current
+        try:
+            with open(self.filepath, 'wb') as f:
+                HBJSON_Codec.HBJSONEncoder(f).encode(data_to_save)
+        finally:
+            context.scene.frame_set(current_frame)
+
+        self.report({'INFO'}, f"HBJSON with {num_frames} frames saved to {self.filepath}")
+        return {'FINISHED'}
 
     def execute(self, context):
-        self.buffer = bytearray()  # Reset the buffer here
-        data_to_save = json.loads(context.scene.json_data[0].json)
-        self.write_marker(self.MarkerObjectStart)
-        self.write_object(data_to_save)
-        self.write_marker(self.MarkerObjectEnd)
+        export = export_cache.pop(self.export_handle, None)
+        if export is None:
+            self.report({'ERROR'}, "Nothing to save, run the export again.")
+            return {'CANCELLED'}
+
+        if self.export_animation:
+            return self.save_animation(context, export)
+
+        data_to_save = HBJsonGenerator().generate_packed(*export["points"])
         with open(self.filepath, 'wb') as f:
-            f.write(self.buffer)
+            HBJSON_Codec.HBJSONEncoder(f).encode(data_to_save)
         self.report({'INFO'}, f"HBJSON saved to {self.filepath}")
         return {'FINISHED'}
 
@@ -278,6 +264,8 @@ class SaveHBJSONOperator(bpy.types.Operator):
         project_name = os.path.splitext(os.path.basename(blend_file_path))[0]
         default_filename = f"FX_HJ_<FACTION>_{project_name}_{context.scene.point_cache_type}.hbjson"
         self.filepath = os.path.join(os.path.dirname(blend_file_path), default_filename)
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
         
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
@@ -286,6 +274,19 @@ class ExportEnginesOperator(bpy.types.Operator):
     bl_idname = "wm.export_engines"
     bl_label = "Houdini Point Cache (.hbjson)"
     bl_description = "Export engines, lights or vector thrusters in Houdini Point Cache format for HW3."
+    bl_options = {'REGISTER'}
+
+    normal_tolerance: bpy.props.FloatProperty(
+        name="Normal Tolerance",
+        description="Loop normals closer than this on every axis count as the same normal when picking a mesh's dominant normal",
+        default=1e-3,
+        min=0.0,
+        precision=5,
+    )
+
+    def invoke(self, context, event):
+        # The objects are sampled with the tolerance set here, before the file browser opens
+        return context.window_manager.invoke_props_dialog(self)
 
     def execute(self, context):
         collections = bpy.data.collections
@@ -319,78 +320,219 @@ class ExportEnginesOperator(bpy.types.Operator):
         if not target:
             self.report({'ERROR'}, "No \"Engines\", \"Vjets\" or \"Hero\" collection found.")
         else:
-            objects = target.objects
-            bpy.ops.object.select_all(action='DESELECT')
-            for obj in objects:
-                obj.select_set(True)
-            
-            context.scene.objects_meta.clear()
-
-            for obj in objects:
-                if obj.type == 'EMPTY':
-                    matrix = obj.matrix_world
-                    normal_vector = matrix.to_3x3() @ mathutils.Vector((0, 0, 1))
-                    normal_vector.normalize()
-                    
-                    meta = context.scene.objects_meta.add()
-                    meta.location = obj.location
-                    meta.dimensions = obj.scale
-                    meta.normal = normal_vector
-                    continue
-
-                if obj.type == 'MESH':
-                    bpy.ops.object.select_all(action='DESELECT')
-                    obj.select_set(True)
-
-                    bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-                    bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='MEDIAN')
-
-                    meta = context.scene.objects_meta.add()
-                    meta.location = obj.location
-                    meta.dimensions = obj.dimensions
-
-                    mesh = obj.data
-                    normals = [l.normal.copy().freeze() for l in mesh.loops]
-                    common_normal = Counter(normals).most_common(1)[0][0]
-                    meta.normal = common_normal
-                    obj.select_set(False)
-                    continue
-                self.report({'WARNING'}, f"Object {obj.name} is not a mesh or empty object and as been ignored for " + export_type + " export.")
-
-            hb_json_generator = HBJsonGenerator()
-            raw_engine_data = [{'location': list(meta.location), 'dimensions': list(meta.dimensions), 'normal':list(meta.normal)} for meta in context.scene.objects_meta]
-            json_data = hb_json_generator.generate_json(raw_engine_data)
-            context.scene.json_data.clear()
-            context.scene.json_data.add()
-            context.scene.json_data[0].json = json.dumps(json_data)
+            sample_cache.hits = 0
+            sample_cache.misses = 0
+            locations, dimensions, normals, ignored = sample_objects(target.objects, self.normal_tolerance, cache=sample_cache)
+            for name in ignored:
+                self.report({'WARNING'}, f"Object {name} is not a mesh or empty object and as been ignored for " + export_type + " export.")
+
+            evicted = sample_cache.evict(bpy.data.objects, bpy.data.meshes)
+            self.report({'INFO'}, f"Mesh samples: {sample_cache.hits} reused, {sample_cache.misses} recomputed, {evicted} evicted.")
+
+            if not len(locations):
+                self.report({'ERROR'}, f"No mesh or empty object found in the {export_type} collection.")
+                return {'CANCELLED'}
+
+            export_cache.clear()
+            export_cache[target.name] = {
+                "collection": target.name,
+                "normal_tolerance": self.normal_tolerance,
+                "points": (locations, dimensions, normals),
+            }
             context.scene.point_cache_type = export_type
 
+            bpy.ops.wm.save_hbjson('INVOKE_DEFAULT', export_handle=target.name)
+        return {'FINISHED'}
+
+def frame_columns(points):
+    # One (num_points, size) view per attribute of a frame's structured array, the record markers left out
+    return {name: points[name] for name in points.dtype.names[1:-1]}
+
+def cache_attributes(columns):
+    # (name, type, foreach_set property, flat values) of the mesh attributes holding every column but P
+    attributes = []
+    for name, values in columns.items():
+        if name == "P":
+            continue
+
+        size = values.shape[1]
+        if values.dtype.kind == 'f':
+            if name == "Cd" and size in (3, 4):
+                colors = np.ones((len(values), 4), dtype=np.float32)
+                colors[:, :size] = values
+                attributes.append((name, 'FLOAT_COLOR', "color", colors.ravel()))
+                continue
+            if size in (2, 3):
+                data_type = 'FLOAT2' if size == 2 else 'FLOAT_VECTOR'
+                attributes.append((name, data_type, "vector", np.ascontiguousarray(values, dtype=np.float32).ravel()))
+                continue
+            data_type, dtype = 'FLOAT', np.float32
+        elif values.dtype.kind == 'b':
+            data_type, dtype = 'BOOLEAN', bool
+        else:
+            # Blender integer attributes are 32 bits wide
+            data_type, dtype = 'INT', np.int32
+            values = np.clip(values, np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+        # Other sizes are split into one attribute per component
+        for i in range(size):
+            component = name if size == 1 else f"{name}_{i}"
+            attributes.append((component, data_type, "value", np.ascontiguousarray(values[:, i], dtype=dtype)))
+    return attributes
+
+def point_positions(columns):
+    return np.ascontiguousarray(columns["P"][:, :3], dtype=np.float32).ravel()
+
+def apply_frame(mesh, columns):
+    # Every value is written with one foreach_set call per attribute, the mesh keeps its vertices
+    mesh.vertices.foreach_set("co", point_positions(columns))
+    for name, data_type, field, values in cache_attributes(columns):
+        attribute = mesh.attributes.get(name)
+        if attribute is None:
+            attribute = mesh.attributes.new(name, data_type, 'POINT')
+        attribute.data.foreach_set(field, values)
+    mesh.update()
+
+def add_shape_keys(obj, frames, frame_start):
+    # One relative shape key per frame, fully on at its scene frame only
+    obj.shape_key_add(name="Basis", from_mix=False)
+    last = frame_start + len(frames) - 1
+    for i, columns in enumerate(frames):
+        key = obj.shape_key_add(name=f"Frame {i}", from_mix=False)
+        key.data.foreach_set("co", point_positions(columns))
+
+        frame = frame_start + i
+        for value, at in ((0.0, frame - 1), (1.0, frame), (0.0, frame + 1)):
+            if frame_start <= at <= last:
+                key.value = value
+                key.keyframe_insert("value", frame=at)
+
+def load_cache_frames(filepath):
+    try:
+        _, frames = HBJSON_Reader.read_point_cache(bpy.path.abspath(filepath))
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Could not read {filepath}: {e}")
+        return {"frames": [], "index": None}
+    return {"frames": [frame_columns(frame["frame_data"]) for frame in frames], "index": None}
+
+# Decoded frames of the meshes imported with a frame handler, keyed by the mesh's session_uid
+imported_caches = {}
+
+@bpy.app.handlers.persistent
+def swap_cache_frames(scene, depsgraph=None):
+    # Meshes keep their file path, their frames are read again after the .blend file is reopened
+    for mesh in bpy.data.meshes:
+        filepath = mesh.get("hbjson_filepath")
+        if filepath is None:
+            continue
+
+        entry = imported_caches.get(mesh.session_uid)
+        if entry is None:
+            entry = imported_caches[mesh.session_uid] = load_cache_frames(filepath)
+        frames = entry["frames"]
+        if not frames:
+            continue
+
+        index = min(max(scene.frame_current - mesh.get("hbjson_frame_start", 1), 0), len(frames) - 1)
+        if index == entry["index"] or len(frames[index]["P"]) != len(mesh.vertices):
+            continue
+        apply_frame(mesh, frames[index])
+        entry["index"] = index
+
+class ImportHBJSONOperator(bpy.types.Operator):
+    bl_idname = "wm.import_hbjson"
+    bl_label = "Houdini Point Cache (.hbjson)"
+    bl_description = "Import a Houdini Point Cache as a point cloud mesh, its attributes stored as mesh attributes."
 
-            bpy.ops.wm.save_hbjson('INVOKE_DEFAULT')
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    filter_glob: bpy.props.StringProperty(default="*.hbjson;*.hbjz", options={'HIDDEN'})
+
+    animation: bpy.props.EnumProperty(
+        name="Animation",
+        description="How the frames of a multi-frame cache are imported",
+        items=[
+            ('HANDLER', "Frame Handler", "Swap the positions and attributes of the mesh when the scene frame changes"),
+            ('SHAPE_KEYS', "Shape Keys", "One shape key per frame. Attributes other than P keep the values of the first frame"),
+            ('FIRST', "First Frame", "Only import the first frame"),
+        ],
+        default='HANDLER',
+    )
+    frame_start: bpy.props.IntProperty(name="Start Frame", description="Scene frame of the cache's first frame", default=1)
+
+    def execute(self, context):
+        try:
+            _, frames = HBJSON_Reader.read_point_cache(self.filepath)
+        except (OSError, ValueError, EOFError) as e:
+            self.report({'ERROR'}, f"Could not read {self.filepath}: {e}")
+            return {'CANCELLED'}
+
+        if not frames:
+            self.report({'ERROR'}, f"{self.filepath} holds no frame.")
+            return {'CANCELLED'}
+
+        columns = [frame_columns(frame["frame_data"]) for frame in frames]
+        if "P" not in columns[0]:
+            self.report({'ERROR'}, f"{self.filepath} has no P attribute.")
+            return {'CANCELLED'}
+
+        animation = self.animation if len(columns) > 1 else 'FIRST'
+        if animation != 'FIRST' and len({len(frame["P"]) for frame in columns}) > 1:
+            self.report({'WARNING'}, "The point count changes between frames, only the first frame has been imported.")
+            animation = 'FIRST'
+
+        name = os.path.splitext(os.path.basename(self.filepath))[0]
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(len(columns[0]["P"]))
+        apply_frame(mesh, columns[0])
+        obj = bpy.data.objects.new(name, mesh)
+        context.collection.objects.link(obj)
+
+        if animation == 'SHAPE_KEYS':
+            add_shape_keys(obj, columns, self.frame_start)
+        elif animation == 'HANDLER':
+            mesh["hbjson_filepath"] = self.filepath
+            mesh["hbjson_frame_start"] = self.frame_start
+            imported_caches[mesh.session_uid] = {"frames": columns, "index": 0}
+            swap_cache_frames(context.scene)
+
+        self.report({'INFO'}, f"Imported {len(mesh.vertices)} points and {len(columns)} frames from {self.filepath}")
         return {'FINISHED'}
 
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
 
 def export_menu_func(self, context):
     self.layout.operator(ExportEnginesOperator.bl_idname)
 
+def import_menu_func(self, context):
+    self.layout.operator(ImportHBJSONOperator.bl_idname)
+
 def register():
-    bpy.utils.register_class(ObjectMetaProperty)
-    bpy.utils.register_class(HBJsonPropertyGroup)
     bpy.utils.register_class(SaveHBJSONOperator)
     bpy.utils.register_class(ExportEnginesOperator)
+    bpy.utils.register_class(ImportHBJSONOperator)
     bpy.types.TOPBAR_MT_file_export.append(export_menu_func)
-    bpy.types.Scene.objects_meta = bpy.props.CollectionProperty(type=ObjectMetaProperty)
-    bpy.types.Scene.json_data = bpy.props.CollectionProperty(type=HBJsonPropertyGroup)
+    bpy.types.TOPBAR_MT_file_import.append(import_menu_func)
     bpy.types.Scene.point_cache_type = bpy.props.StringProperty(name="Point Cache Type")
+    bpy.app.handlers.depsgraph_update_post.append(track_mesh_updates)
+    bpy.app.handlers.frame_change_post.append(swap_cache_frames)
 
 def unregister():
-    bpy.utils.unregister_class(ObjectMetaProperty)
-    bpy.utils.unregister_class(HBJsonPropertyGroup)
     bpy.utils.unregister_class(SaveHBJSONOperator)
     bpy.utils.unregister_class(ExportEnginesOperator)
+    bpy.utils.unregister_class(ImportHBJSONOperator)
     bpy.types.TOPBAR_MT_file_export.remove(export_menu_func)
-    del bpy.types.Scene.objects_meta
-    del bpy.types.Scene.json_data
+    bpy.types.TOPBAR_MT_file_import.remove(import_menu_func)
+    export_cache.clear()
+    if track_mesh_updates in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(track_mesh_updates)
+    if swap_cache_frames in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(swap_cache_frames)
+    sample_cache.clear()
+    imported_caches.clear()
 
     # Remove the option if it already exists
     bpy.types.TOPBAR_MT_window.remove(export_menu_func)
@@ -0,0 +1,217 @@
+import copy
+import numpy as np
+
+try:
+    from . import HBJSON_Codec
+except ImportError:
+    import HBJSON_Codec
+
+# Values of the attributes that are the same for every exported point
+CONSTANT_ATTRIBUTES = {
+    "Alpha": 1.0,
+    "Color": 1.0,
+    "class": 0.0,
+    "CameraOffset": 1073741824,
+    "Age": 0.0,
+    "age": 0.0,
+    "DynamicMaterialParameterW": 1.0,
+    "Life": 1.0,
+    "DynamicMaterialParameterX": 1.0,
+    "Cd": 1.0,
+    "DynamicMaterialParameterY": 1.0,
+    "DynamicMaterialParameterZ": 1.0,
+    "aligntosurface": 1.401298464324817e-45,
+    "MaterialOption": 0.0,
+}
+
+class HBJsonGenerator:
+    def __init__(self):
+        self.template = {
+            "header": {
+                "version": "1.0",
+                "num_samples": 0,
+                "num_frames": 1,
+                "num_points": 0,
+                "num_attrib": 20,
+                "attrib_name": [
+                    "id",
+                    "InitialSpriteSizeX",
+                    "InitialSpriteSizeY",
+                    "Alpha",
+                    "Color",
+                    "class",
+                    "pscale",
+                    "CameraOffset",
+                    "Age",
+                    "age",
+                    "P",
+                    "DynamicMaterialParameterW",
+                    "Life",
+                    "DynamicMaterialParameterX",
+                    "Cd",
+                    "DynamicMaterialParameterY",
+                    "DynamicMaterialParameterZ",
+                    "hitnormal",
+                    "aligntosurface",
+                    "MaterialOption",
+                ],
+                "attrib_size": [
+                    1,
+                    1,
+                    1,
+                    1,
+                    3,
+                    1,
+                    1,
+                    1,
+                    1,
+                    1,
+                    3,
+                    1,
+                    1,
+                    1,
+                    3,
+                    1,
+                    1,
+                    3,
+                    1,
+                    1
+                ],
+                "attrib_data_type": [
+                    108,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    108,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    102,
+                    108,
+                    108
+                ],
+                "data_type": "linear"
+            },
+            "cache_data": {
+                "frames": [
+                    {
+                        "number": 0,
+                        "time": 0,
+                        "num_points": 0,
+                        "frame_data": []
+                    }
+                ]
+            }
+        }
+
+    def attributes(self):
+        header = self.template["header"]
+        return list(zip(header["attrib_name"], header["attrib_size"], header["attrib_data_type"]))
+
+    def header(self, num_points, num_frames=1):
+        output = copy.deepcopy(self.template)
+        output["header"]["num_samples"] = num_points
+        output["header"]["num_frames"] = num_frames
+        output["header"]["num_points"] = num_points
+        output["cache_data"]["frames"][0]["num_points"] = num_points
+        return output
+
+    def generate_columns(self, locations, dimensions, normals):
+        # One (num_points, size) array per attribute, in the order of the header
+        locations = np.asarray(locations, dtype=np.float64).reshape(-1, 3)
+        dimensions = np.asarray(dimensions, dtype=np.float64).reshape(-1, 3)
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        num_points = len(locations)
+
+        max_dimension = dimensions.max(axis=1, initial=0.0)
+        inputs_max_dimension = max_dimension.max(initial=0.0)
+        sprite_size = (max_dimension * 500)[:, None]
+        pscale = (max_dimension / inputs_max_dimension)[:, None] if inputs_max_dimension else np.zeros((num_points, 1))
+
+        computed = {
+            "id": np.arange(num_points, dtype=np.int64)[:, None],
+            "InitialSpriteSizeX": sprite_size,
+            "InitialSpriteSizeY": sprite_size,
+            "pscale": pscale,
+            "P": locations,
+            "hitnormal": normals,
+        }
+
+        columns = []
+        for name, size, data_type in self.attributes():
+            if name in computed:
+                columns.append(computed[name])
+            else:
+                value = CONSTANT_ATTRIBUTES[name]
+                columns.append(np.broadcast_to(np.array(value, dtype=type(value)), (num_points, size)))
+        return columns
+
+    def generate_json(self, input_data):
+        # Legacy entry point, input_data is a list of {"location", "dimensions", "normal"} dicts
+        locations = [point["location"] for point in input_data]
+        dimensions = [point["dimensions"] for point in input_data]
+        normals = [point["normal"] for point in input_data]
+        return self.generate_dict(locations, dimensions, normals)
+
+    def generate_dict(self, locations, dimensions, normals):
+        columns = self.generate_columns(locations, dimensions, normals)
+        output = self.header(len(columns[0]) if columns else 0)
+        lists = [column.tolist() for column in columns]
+        output["cache_data"]["frames"][0]["frame_data"] = [list(point) for point in zip(*lists)]
+        return output
+
+    def point_dtype(self):
+        # Any attribute type of the header, the fields are named after the attributes
+        header = self.template["header"]
+        num_attrib = header["num_attrib"]
+        layout = HBJSON_Codec.point_layout(header["attrib_size"][:num_attrib], header["attrib_data_type"][:num_attrib])
+        return HBJSON_Codec.point_dtype(layout, header["attrib_name"])
+
+    def pack_columns(self, columns):
+        num_points = len(columns[0]) if columns else 0
+        points = np.empty(num_points, dtype=self.point_dtype())
+        points["point_start"] = ord(b'[')
+        points["point_end"] = ord(b']')
+        for (name, _, _), column in zip(self.attributes(), columns):
+            # Attributes of unsupported types take no bytes
+            if name in points.dtype.fields:
+                points[name] = column
+        return points.tobytes()
+
+    def generate_packed(self, locations, dimensions, normals):
+        # Same cache as generate_json, with frame_data packed straight from (n, 3) arrays
+        columns = self.generate_columns(locations, dimensions, normals)
+        output = self.header(len(columns[0]) if columns else 0)
+        output["cache_data"]["frames"][0]["frame_data"] = self.pack_columns(columns)
+        return output
+
+    def generate_frame(self, number, time, locations, dimensions, normals):
+        columns = self.generate_columns(locations, dimensions, normals)
+        return {
+            "number": number,
+            "time": time,
+            "num_points": len(columns[0]) if columns else 0,
+            "frame_data": self.pack_columns(columns),
+        }
+
+    def generate_frames(self, samples):
+        # samples yields (number, time, locations, dimensions, normals), each frame is packed only when it is reached
+        for number, time, locations, dimensions, normals in samples:
+            yield self.generate_frame(number, time, locations, dimensions, normals)
@@ -0,0 +1,125 @@
+import struct
+
+try:
+    from . import HBJSON_Codec
+    from . import HBJSON_Container
+except ImportError:
+    import HBJSON_Codec
+    import HBJSON_Container
+
+class HBJsonReader:
+    # Decodes a whole .hbjson or .hbjz file, each frame_data becomes a NumPy structured array of its point records
+    def __init__(self, data):
+        if HBJSON_Container.is_container(data):
+            data = HBJSON_Container.expand_container(data)
+        self.data = data
+        self.position = 0
+        self.num_attrib = 0
+        self.num_points = 0
+        self.attrib_name = []
+        self.attrib_size = []
+        self.attrib_type = []
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path, 'rb') as file:
+            return cls(file.read())
+
+    def read(self):
+        if self.read_marker() != HBJSON_Codec.HBJSONEncoder.MarkerObjectStart:
+            raise ValueError("Invalid file format.")
+        return self.read_object()
+
+    def read_marker(self):
+        if self.position >= len(self.data):
+            raise EOFError("End of file reached.")
+        marker = self.data[self.position]
+        self.position += 1
+        return marker
+
+    def read_bytes(self, n):
+        if self.position + n > len(self.data):
+            raise EOFError("End of file reached.")
+        value = self.data[self.position:self.position + n]
+        self.position += n
+        return value
+
+    def read_string(self):
+        return self.read_bytes(self.read_marker()).decode('utf-8')
+
+    def read_object(self):
+        obj = {}
+        while True:
+            marker = self.read_marker()
+            if marker == HBJSON_Codec.HBJSONEncoder.MarkerObjectEnd:
+                return obj
+            if marker != HBJSON_Codec.HBJSONEncoder.MarkerTypeUInt8:
+                raise ValueError(f"Expected an object key at byte {self.position - 1}")
+            key = self.read_string()
+            obj[key] = self.read_value(key)
+
+    def read_value(self, key):
+        if key in ["num_samples", "num_frames", "num_points", "number", "time"]:
+            value = struct.unpack('I', self.read_bytes(4))[0]
+            if key == "num_points":
+                self.num_points = value
+            return value
+        if key == "num_attrib":
+            self.num_attrib = struct.unpack('H', self.read_bytes(2))[0]
+            return self.num_attrib
+        if key == "attrib_data_type":
+            self.attrib_type = self.read_type_list()
+            return self.attrib_type
+        if key == "frame_data":
+            return self.read_points()
+
+        value = self.read_any(self.read_marker())
+        if key == "attrib_name":
+            self.attrib_name = value
+        elif key == "attrib_size":
+            self.attrib_size = value
+        return value
+
+    def read_any(self, marker):
+        if marker == HBJSON_Codec.HBJSONEncoder.MarkerTypeUInt8:
+            return self.read_string()
+        if marker == HBJSON_Codec.HBJSONEncoder.MarkerObjectStart:
+            return self.read_object()
+        if marker == HBJSON_Codec.HBJSONEncoder.MarkerArrayStart:
+            values = []
+            while True:
+                marker = self.read_marker()
+                if marker == HBJSON_Codec.HBJSONEncoder.MarkerArrayEnd:
+                    return values
+                values.append(self.read_any(marker))
+        return marker
+
+    def read_type_list(self):
+        if self.read_marker() != HBJSON_Codec.HBJSONEncoder.MarkerArrayStart:
+            raise ValueError("Invalid file format.")
+        types = []
+        while True:
+            marker = self.read_marker()
+            if marker == HBJSON_Codec.HBJSONEncoder.MarkerArrayEnd:
+                return types
+            types.append(marker)
+
+    def read_points(self):
+        if self.read_marker() != HBJSON_Codec.HBJSONEncoder.MarkerArrayStart:
+            raise ValueError("Invalid file format.")
+        if len(self.attrib_name) < self.num_attrib:
+            raise ValueError(f"attrib_name lists {len(self.attrib_name)} attributes, num_attrib is {self.num_attrib}")
+        # Same record layout as the Transcoder's loader, with the attribute names as field names
+        layout = HBJSON_Codec.point_layout(self.attrib_size[:self.num_attrib], self.attrib_type[:self.num_attrib])
+        dtype = HBJSON_Codec.point_dtype(layout, self.attrib_name)
+        points = HBJSON_Codec.decode_points(self.read_bytes(dtype.itemsize * self.num_points), dtype, self.num_points)
+        if points is None:
+            raise ValueError(f"Point records do not match the {dtype.itemsize} bytes layout of the header")
+        if self.read_marker() != HBJSON_Codec.HBJSONEncoder.MarkerArrayEnd:
+            raise ValueError("Invalid file format.")
+        return points
+
+def read_point_cache(file_path):
+    # Returns the header and the frames, frame_data being a structured array with one field per attribute
+    cache = HBJsonReader.from_file(file_path).read()
+    return cache["header"], cache["cache_data"]["frames"]
@@ -0,0 +1,30 @@
+@echo off
+REM Package the addon with the shared codec of the Transcoder into an installable zip
+setlocal
+set addon_name=HBJSON_BlenderAddon
+set build_dir=build\%addon_name%
+set zip_name=%addon_name%.zip
+
+if exist build rmdir /s /q build
+mkdir "%build_dir%"
+
+REM The addon module becomes the package __init__, next to the modules it imports
+copy /y "%addon_name%.py" "%build_dir%\__init__.py" >nul
+copy /y "HBJSON_Generator.py" "%build_dir%\HBJSON_Generator.py" >nul
+copy /y "HBJSON_Reader.py" "%build_dir%\HBJSON_Reader.py" >nul
+copy /y "..\Transcoder\HBJSON_Codec.py" "%build_dir%\HBJSON_Codec.py" >nul
+copy /y "..\Transcoder\HBJSON_Container.py" "%build_dir%\HBJSON_Container.py" >nul
+
+REM Check if Compress-Archive is available
+powershell -Command "Get-Command Compress-Archive" >nul 2>&1
+if %ERRORLEVEL% equ 0 (
+    REM Use Compress-Archive if available
+    powershell -Command "Compress-Archive -Path '%build_dir%' -DestinationPath '%cd%\%zip_name%' -Force"
+) else (
+    REM Use tar as a fallback
+    tar -a -c -f "%zip_name%" -C build %addon_name%
+)
+
+echo Build and zip completed successfully.
+pause
+endlocal
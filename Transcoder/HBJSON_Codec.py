@@ -0,0 +1,320 @@
+import struct
+from functools import lru_cache
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# struct codes of the attribute types stored in frame_data, keyed by their attrib_data_type marker
+# The same codes are NumPy type characters
+TYPE_CODES = {
+    ord(b'b'): 'b', ord(b'B'): 'B', ord(b'?'): '?',
+    ord(b'h'): 'h', ord(b'H'): 'H',
+    ord(b'l'): 'i', ord(b'L'): 'I',
+    ord(b'q'): 'q', ord(b'Q'): 'Q',
+    ord(b'f'): 'f', ord(b'd'): 'd'
+}
+
+TYPE_NAMES = {
+    ord(b'b'): "int8", ord(b'B'): "uint8", ord(b'?'): "bool",
+    ord(b'h'): "int16", ord(b'H'): "uint16",
+    ord(b'l'): "int32", ord(b'L'): "uint32",
+    ord(b'q'): "int64", ord(b'Q'): "uint64",
+    ord(b'f'): "float32", ord(b'd'): "float64"
+}
+
+class ObjectStream:
+    # Object whose members are produced as they are iterated, written without being held in memory
+    def __init__(self, items):
+        self.iterator = items
+
+    def items(self):
+        return self.iterator
+
+    def drain(self):
+        for _ in self.iterator:
+            pass
+
+class ArrayStream:
+    # Array whose elements are produced as they are iterated
+    def __init__(self, items):
+        self.iterator = items
+
+    def __iter__(self):
+        return self.iterator
+
+    def drain(self):
+        for _ in self.iterator:
+            pass
+
+class PointSchema:
+    def __init__(self, attrib_size, codes):
+        self.attrib_size = attrib_size
+        self.codes = codes
+        self.struct = struct.Struct('=B' + ''.join(f"{size}{code}" for size, code in zip(attrib_size, codes)) + 'B')
+
+    def pack(self, point):
+        return self.struct.pack(HBJSONEncoder.MarkerArrayStart, *chain.from_iterable(point), HBJSONEncoder.MarkerArrayEnd)
+
+@lru_cache(maxsize=32)
+def compile_point_schema(attrib_name, attrib_size, attrib_data_type):
+    # Arguments are tuples so the schema itself is the cache key
+    if len(attrib_data_type) < len(attrib_size):
+        return None
+    codes = [TYPE_CODES.get(data_type) for data_type in attrib_data_type[:len(attrib_size)]]
+    if None in codes:
+        return None
+    return PointSchema(attrib_size, codes)
+
+def point_layout(attrib_size, attrib_data_type):
+    # (index, code, size) of the attributes stored in a point record, those of unsupported types take no bytes
+    layout = []
+    for i, (size, data_type) in enumerate(zip(attrib_size, attrib_data_type)):
+        code = TYPE_CODES.get(data_type)
+        if code is not None and size > 0:
+            layout.append((i, code, size))
+    return layout
+
+def point_dtype(layout, names=None):
+    # NumPy structured dtype of a point record with its markers, fields are named attrib_<index> when names is None
+    fields = [("point_start", 'u1')]
+    fields += [(f"attrib_{i}" if names is None else names[i], '=' + code, (size,)) for i, code, size in layout]
+    fields.append(("point_end", 'u1'))
+    return np.dtype(fields)
+
+def decode_points(buffer, dtype, num_points, offset=0):
+    # Point records of a frame_data block as a structured array, None when the markers of a record do not match
+    points = np.frombuffer(buffer, dtype=dtype, count=num_points, offset=offset)
+    if (points["point_start"] != HBJSONEncoder.MarkerArrayStart).any() or (points["point_end"] != HBJSONEncoder.MarkerArrayEnd).any():
+        return None
+    return points
+
+class HBJSONEncoder:
+    MarkerTypeChar = ord(b'c')
+    MarkerTypeInt8 = ord(b'b')
+    MarkerTypeUInt8 = ord(b'B')
+    MarkerTypeBool = ord(b'?')
+    MarkerTypeInt16 = ord(b'h')
+    MarkerTypeUInt16 = ord(b'H')
+    MarkerTypeInt32 = ord(b'l')
+    MarkerTypeUInt32 = ord(b'L')
+    MarkerTypeInt64 = ord(b'q')
+    MarkerTypeUInt64 = ord(b'Q')
+    MarkerTypeFloat32 = ord(b'f')
+    MarkerTypeFloat64 = ord(b'd')
+    MarkerTypeString = ord(b's')
+    MarkerObjectStart = ord(b'{')
+    MarkerObjectEnd = ord(b'}')
+    MarkerArrayStart = ord(b'[')
+    MarkerArrayEnd = ord(b']')
+
+    def __init__(self, stream=None, flush_size=1 << 20, stats=None):
+        self.stream = stream
+        self.flush_size = flush_size
+        # Optional ConversionStats of the Transcoder, counts the frames and points written
+        self.stats = stats
+        self.buffer = bytearray()
+        self.point_structs = {}
+        self.schema = {}
+
+    def encode(self, data):
+        self.write_marker(self.MarkerObjectStart)
+        self.write_object(data)
+        self.write_marker(self.MarkerObjectEnd)
+        self.flush()
+
+    def flush(self):
+        if self.stream is not None:
+            self.stream.write(self.buffer)
+            self.buffer.clear()
+
+    def write_marker(self, marker):
+        self.buffer.append(marker)
+
+    def write_uint8_string(self, string):
+        self.buffer.append(len(string))
+        self.buffer.extend(string.encode('utf-8'))
+
+    def write_uint32(self, value):
+        self.buffer.extend(struct.pack('I', value))
+
+    def write_uint16(self, value):
+        self.buffer.extend(struct.pack('H', value))
+
+    def write_list(self, list_data):
+        self.write_marker(self.MarkerArrayStart)
+        for item in list_data:
+            if isinstance(item, str):
+                self.write_marker(self.MarkerTypeUInt8)
+                self.write_uint8_string(item)
+            elif isinstance(item, (dict, ObjectStream)):
+                self.write_marker(self.MarkerObjectStart)
+                self.write_object(item)
+                self.write_marker(self.MarkerObjectEnd)
+            elif isinstance(item, (list, ArrayStream)):
+                self.write_list(item)
+            else:
+                self.write_marker(item)
+
+        self.write_marker(self.MarkerArrayEnd)
+
+    def write_object(self, obj):
+        for key, value in obj.items():
+            self.write_marker(self.MarkerTypeUInt8)
+            self.write_uint8_string(key)
+
+            if key == "frame_data":
+                self.write_frames_data(value)
+            elif isinstance(value, int):
+                if key in ["num_samples", "num_frames", "num_points", "number", "time"]:
+                    self.write_uint32(value)
+                elif key in ["num_attrib"]:
+                    self.write_uint16(value)
+            elif isinstance(value, (list, ArrayStream)):
+                if key in ["attrib_name", "attrib_size", "attrib_data_type"] and isinstance(value, list):
+                    self.schema[key] = tuple(value)
+                self.write_list(value)
+            elif isinstance(value, (dict, ObjectStream)):
+                self.write_marker(self.MarkerObjectStart)
+                self.write_object(value)
+                self.write_marker(self.MarkerObjectEnd)
+            else:
+                self.write_marker(self.MarkerTypeUInt8)
+                self.write_uint8_string(str(value))
+
+    def point_schema(self):
+        try:
+            return compile_point_schema(self.schema["attrib_name"], self.schema["attrib_size"], self.schema["attrib_data_type"])
+        except (KeyError, TypeError):
+            return None
+
+    def write_frames_data(self, frames_data):
+        if isinstance(frames_data, (bytes, bytearray, memoryview)):
+            self.write_packed_frames_data(frames_data)
+            return
+
+        # frames_data may be any iterable of points, the buffer is flushed as it fills
+        schema = self.point_schema()
+        self.write_marker(self.MarkerArrayStart)
+        num_points = 0
+        for num_points, frame in enumerate(frames_data, 1):
+            if schema is None:
+                self.write_point(frame)
+            else:
+                try:
+                    self.buffer += schema.pack(frame)
+                except struct.error:
+                    # Values that do not match the header are written as their Python type dictates
+                    self.write_point(frame)
+            if len(self.buffer) >= self.flush_size:
+                self.flush()
+        self.write_marker(self.MarkerArrayEnd)
+        self.flush()
+
+        if self.stats is not None:
+            self.stats.add("frames", 1)
+            self.stats.add("points", num_points)
+
+    def write_packed_frames_data(self, frames_data):
+        # Point records already packed with their markers, as produced from a NumPy structured array
+        self.write_marker(self.MarkerArrayStart)
+        self.flush()
+        if self.stream is not None:
+            self.stream.write(frames_data)
+        else:
+            self.buffer += frames_data
+        self.write_marker(self.MarkerArrayEnd)
+        self.flush()
+
+        if self.stats is not None:
+            self.stats.add("frames", 1)
+
+    def attribute_code(self, attribute):
+        if all(isinstance(i, int) for i in attribute):
+            return 'i'
+        if all(isinstance(i, float) for i in attribute):
+            return 'f'
+        return None
+
+    def point_struct(self, layout):
+        point_struct = self.point_structs.get(layout)
+        if point_struct is None:
+            # Attributes that are neither all int nor all float are not written
+            point_struct = struct.Struct('=B' + ''.join(f"{size}{code}" for code, size in layout if code) + 'B')
+            self.point_structs[layout] = point_struct
+        return point_struct
+
+    def write_point(self, point):
+        codes = [self.attribute_code(attribute) for attribute in point]
+        point_struct = self.point_struct(tuple((code, len(attribute)) for code, attribute in zip(codes, point)))
+        values = [item for code, attribute in zip(codes, point) if code for item in attribute]
+        self.buffer += point_struct.pack(self.MarkerArrayStart, *values, self.MarkerArrayEnd)
+
+# Integer types with the range of values they hold
+INTEGER_RANGES = [
+    (HBJSONEncoder.MarkerTypeInt8, -2 ** 7, 2 ** 7 - 1),
+    (HBJSONEncoder.MarkerTypeUInt8, 0, 2 ** 8 - 1),
+    (HBJSONEncoder.MarkerTypeInt16, -2 ** 15, 2 ** 15 - 1),
+    (HBJSONEncoder.MarkerTypeUInt16, 0, 2 ** 16 - 1),
+    (HBJSONEncoder.MarkerTypeInt32, -2 ** 31, 2 ** 31 - 1),
+    (HBJSONEncoder.MarkerTypeUInt32, 0, 2 ** 32 - 1),
+    (HBJSONEncoder.MarkerTypeInt64, -2 ** 63, 2 ** 63 - 1),
+    (HBJSONEncoder.MarkerTypeUInt64, 0, 2 ** 64 - 1),
+]
+
+INTEGER_BOUNDS = {data_type: (minimum, maximum) for data_type, minimum, maximum in INTEGER_RANGES}
+
+float32_struct = struct.Struct('f')
+
+def type_width(data_type):
+    return struct.calcsize(TYPE_CODES[data_type])
+
+def is_float32(value):
+    return value != value or float32_struct.unpack(float32_struct.pack(value))[0] == value
+
+def attribute_values(frames, i):
+    for frame in frames:
+        for point in frame["frame_data"]:
+            yield from point[i]
+
+def narrow_schema(data, floats=False):
+    # Returns the attrib_data_type list with every integer attribute in the narrowest type holding its values,
+    # and the (name, type, narrower type, applied) changes. float64 attributes whose values are all exact
+    # float32 are reported, and only narrowed when floats is set.
+    header = data["header"]
+    frames = data["cache_data"]["frames"]
+    types = list(header["attrib_data_type"])
+    changes = []
+
+    # Packed frames are laid out for the declared types already
+    if not isinstance(frames, list) or any(not isinstance(frame.get("frame_data"), list) for frame in frames):
+        return types, changes
+
+    columns = list(enumerate(zip(header["attrib_name"], types[:header["num_attrib"]])))
+    # A point holding a value that is not an integer in an integer attribute is written by Python type,
+    # not by the header's types, a narrowed header would not match any of its attributes
+    for i, (_, data_type) in columns:
+        if data_type in INTEGER_BOUNDS and not all(isinstance(value, int) for value in attribute_values(frames, i)):
+            return types, changes
+
+    for i, (name, data_type) in columns:
+        if data_type in INTEGER_BOUNDS:
+            values = list(attribute_values(frames, i))
+            if not values:
+                continue
+            low, high = min(values), max(values)
+            signed = INTEGER_BOUNDS[data_type][0] < 0
+            fitting = [candidate for candidate, minimum, maximum in INTEGER_RANGES if minimum <= low and high <= maximum]
+            # Same width, the declared signedness is kept
+            narrower = min(fitting, key=lambda candidate: (type_width(candidate), (INTEGER_BOUNDS[candidate][0] < 0) != signed))
+            if type_width(narrower) < type_width(data_type):
+                types[i] = narrower
+                changes.append((name, data_type, narrower, True))
+        elif data_type == HBJSONEncoder.MarkerTypeFloat64:
+            if all(is_float32(value) for value in attribute_values(frames, i)):
+                changes.append((name, data_type, HBJSONEncoder.MarkerTypeFloat32, floats))
+                if floats:
+                    types[i] = HBJSONEncoder.MarkerTypeFloat32
+    return types, changes
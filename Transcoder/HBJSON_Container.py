@@ -0,0 +1,158 @@
+import json
+import lzma
+import zlib
+import struct
+
+# A container holds the bytes of a .hbjson file, split in two:
+# - the skeleton, every byte that is not a point record (header, keys, frame fields)
+# - the point records, transposed into byte planes, byte j of every record of a frame forming plane j
+# Planes are grouped in blocks, one per attribute and one per record marker, and compressed separately.
+# A plane holding the same byte in every record of every frame is elided, the other planes are stored
+# XORed with the same plane of the previous frame when both frames have as many points.
+
+CONTAINER_MAGIC = b"HBJZ"
+CONTAINER_VERSION = 1
+CONTAINER_EXTENSION = ".hbjz"
+
+COMPRESSIONS = {
+    "none": 0,
+    "zlib": 1,
+    "lzma": 2,
+}
+
+container_header = struct.Struct('<4sBBI')
+
+def compress_block(data, compression):
+    if compression == COMPRESSIONS["zlib"]:
+        return zlib.compress(data, 9)
+    if compression == COMPRESSIONS["lzma"]:
+        return lzma.compress(data, preset=6)
+    return bytes(data)
+
+def decompress_block(data, compression):
+    if compression == COMPRESSIONS["zlib"]:
+        return zlib.decompress(data)
+    if compression == COMPRESSIONS["lzma"]:
+        return lzma.decompress(data)
+    return bytes(data)
+
+def xor_bytes(a, b):
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+def is_container(data):
+    return data[:len(CONTAINER_MAGIC)] == CONTAINER_MAGIC
+
+def pack_container(data, frames, point_size, attributes, compression="zlib"):
+    # frames lists the (offset, num_points) of each frame's point records in data,
+    # attributes the (first byte, width) of each attribute inside a record of point_size bytes
+    compression = COMPRESSIONS[compression]
+    data = memoryview(data)
+
+    skeleton = bytearray()
+    frame_blocks = []
+    manifest_frames = []
+    position = 0
+    for offset, num_points in frames:
+        skeleton += data[position:offset]
+        manifest_frames.append([len(skeleton), num_points])
+        position = offset + point_size * num_points
+        frame_blocks.append(bytes(data[offset:position]))
+    skeleton += data[position:]
+
+    blocks = []
+    payload = bytearray()
+    if frames and point_size:
+        ranges = [(0, 1)] + list(attributes) + [(point_size - 1, 1)]
+        for start, width in ranges:
+            constants = {}
+            block = bytearray()
+            for j in range(start, start + width):
+                planes = [frame_block[j::point_size] for frame_block in frame_blocks]
+                first = next((plane[:1] for plane in planes if plane), b"\0")
+                if all(plane.count(first) == len(plane) for plane in planes):
+                    constants[j] = first[0]
+                    continue
+
+                previous = None
+                for plane in planes:
+                    if previous is not None and len(previous) == len(plane):
+                        block += xor_bytes(plane, previous)
+                    else:
+                        block += plane
+                    previous = plane
+
+            compressed = compress_block(block, compression) if block else b""
+            blocks.append({"start": start, "width": width, "constants": constants, "length": len(compressed)})
+            payload += compressed
+
+    compressed_skeleton = compress_block(skeleton, compression)
+    manifest = json.dumps({
+        "size": len(data),
+        "crc32": zlib.crc32(data),
+        "point_size": point_size,
+        "frames": manifest_frames,
+        "skeleton": len(compressed_skeleton),
+        "blocks": blocks,
+    }, separators=(",", ":")).encode("utf-8")
+
+    return b"".join([
+        container_header.pack(CONTAINER_MAGIC, CONTAINER_VERSION, compression, len(manifest)),
+        manifest,
+        compressed_skeleton,
+        payload,
+    ])
+
+def read_manifest(data):
+    if len(data) < container_header.size:
+        raise ValueError("Truncated container header.")
+    magic, version, compression, manifest_length = container_header.unpack_from(data, 0)
+    if magic != CONTAINER_MAGIC:
+        raise ValueError("Not a point cache container.")
+    if version != CONTAINER_VERSION:
+        raise ValueError(f"Unsupported container version {version}.")
+    if compression not in COMPRESSIONS.values():
+        raise ValueError(f"Unknown container compression {compression}.")
+    position = container_header.size + manifest_length
+    manifest = json.loads(bytes(data[container_header.size:position]).decode("utf-8"))
+    return compression, manifest, position
+
+def expand_container(data):
+    # Returns the exact bytes of the .hbjson file the container was packed from
+    data = memoryview(data)
+    compression, manifest, position = read_manifest(data)
+
+    skeleton = decompress_block(data[position:position + manifest["skeleton"]], compression)
+    position += manifest["skeleton"]
+
+    point_size = manifest["point_size"]
+    frame_blocks = [bytearray(point_size * num_points) for _, num_points in manifest["frames"]]
+    for block in manifest["blocks"]:
+        constants = {int(j): value for j, value in block["constants"].items()}
+        stored = decompress_block(data[position:position + block["length"]], compression) if block["length"] else b""
+        position += block["length"]
+
+        cursor = 0
+        for j in range(block["start"], block["start"] + block["width"]):
+            previous = None
+            for frame_block, (_, num_points) in zip(frame_blocks, manifest["frames"]):
+                if j in constants:
+                    plane = bytes((constants[j],)) * num_points
+                else:
+                    plane = stored[cursor:cursor + num_points]
+                    cursor += num_points
+                    if previous is not None and len(previous) == len(plane):
+                        plane = xor_bytes(plane, previous)
+                    previous = plane
+                frame_block[j::point_size] = plane
+
+    output = bytearray()
+    start = 0
+    for (offset, _), frame_block in zip(manifest["frames"], frame_blocks):
+        output += skeleton[start:offset]
+        output += frame_block
+        start = offset
+    output += skeleton[start:]
+
+    if len(output) != manifest["size"] or zlib.crc32(output) != manifest["crc32"]:
+        raise ValueError("Container checksum mismatch.")
+    return bytes(output)
@@ -0,0 +1,116 @@
+import os
+import json
+import hashlib
+
+# The index of a synced folder maps each source, by its path relative to the folder, to the state it was
+# converted from: its size, mtime and content hash, the conversion options and the output written.
+INDEX_NAME = ".hbjson_index"
+INDEX_VERSION = 1
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_state(stat):
+    return stat.st_size, stat.st_mtime_ns
+
+def scan_folder(folder, extensions):
+    # Relative path and stat of every file with one of the extensions, the index itself left out
+    files = {}
+    pending = [folder]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.startswith(INDEX_NAME):
+                    continue
+                elif os.path.splitext(entry.name)[1] in extensions and entry.is_file():
+                    files[os.path.relpath(entry.path, folder)] = entry.stat()
+    return files
+
+class ConversionIndex:
+    def __init__(self, folder, index_path=None):
+        self.folder = folder
+        self.path = index_path or os.path.join(folder, INDEX_NAME)
+        self.entries = {}
+        self.changed = False
+        # Content hashes computed during this sync, each source is read once
+        self.digests = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            print(f"Ignoring the unreadable index {self.path}: {e}")
+            return self
+        if data.get("version") == INDEX_VERSION:
+            self.entries = data.get("entries", {})
+        return self
+
+    def save(self):
+        if not self.changed:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, file, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+    def digest(self, source):
+        if source not in self.digests:
+            self.digests[source] = file_digest(os.path.join(self.folder, source))
+        return self.digests[source]
+
+    def output_intact(self, entry):
+        if not entry.get("output"):
+            return False
+        try:
+            stat = os.stat(os.path.join(self.folder, entry["output"]))
+        except OSError:
+            return False
+        return list(file_state(stat)) == entry["output_state"]
+
+    def is_up_to_date(self, source, stat, options, retry_failed=True):
+        # Sources whose size and mtime are unchanged are not read, the others are compared by content hash
+        entry = self.entries.get(source)
+        if entry is None or entry["options"] != options:
+            return False
+        if entry.get("output") is None:
+            if retry_failed:
+                return False
+        elif not self.output_intact(entry):
+            return False
+        if list(file_state(stat)) == entry["state"]:
+            return True
+
+        if self.digest(source) != entry["hash"]:
+            return False
+        # Touched or copied again with the same content
+        entry["state"] = list(file_state(stat))
+        self.changed = True
+        return True
+
+    def record(self, source, stat, digest, options, output_path):
+        entry = {"state": list(file_state(stat)), "hash": digest, "options": options, "output": None, "output_state": None}
+        if output_path is not None:
+            entry["output"] = os.path.relpath(output_path, self.folder)
+            entry["output_state"] = list(file_state(os.stat(output_path)))
+        self.entries[source] = entry
+        self.digests.pop(source, None)
+        self.changed = True
+
+    def prune(self, sources, extensions):
+        # Drops the entries of deleted sources, their outputs are kept
+        deleted = [source for source in self.entries if source not in sources and os.path.splitext(source)[1] in extensions]
+        for source in deleted:
+            del self.entries[source]
+        if deleted:
+            self.changed = True
+        return deleted
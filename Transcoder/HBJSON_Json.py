@@ -0,0 +1,281 @@
+import re
+import json
+import math
+import struct
+from HBJSON_Codec import ObjectStream, ArrayStream, HBJSONEncoder
+from HBJSON_Stats import phase, open_output
+from HBJSON_Model import PointCache
+
+FLOAT_FORMATS = ("repr", "float32")
+
+float32_struct = struct.Struct('f')
+
+def float32_repr(value):
+    # Shortest decimal string that reads back as the same float32
+    if math.isnan(value) or math.isinf(value):
+        return json.dumps(value)
+    for precision in ('%.6g', '%.7g', '%.8g'):
+        text = precision % value
+        if float32_struct.unpack(float32_struct.pack(float(text)))[0] == value:
+            break
+    else:
+        text = '%.9g' % value
+    # Keep floats recognisable as floats, the hbjson saver picks int32 or float32 from the JSON type
+    if not any(c in text for c in ".en"):
+        text += ".0"
+    return text
+
+def float_repr(value):
+    if math.isnan(value) or math.isinf(value):
+        return json.dumps(value)
+    return repr(value)
+
+class HoudiniPointCacheWriterJSON:
+    def __init__(self, file_path, compact=False, float_format="repr", indent=4, frame_loader=None, stats=None):
+        self.file_path = file_path
+        self.stats = stats
+        self.compact = compact
+        self.indent = " " * indent
+        self.float_format = float32_repr if float_format == "float32" else float_repr
+        # Float format of each attribute of a point, set from the header when saving
+        self.point_formats = []
+        # Called with the frame number of a frame_data left undecoded by a lazy load
+        self.frame_loader = frame_loader
+        self.frame_count = 0
+        self.stream = None
+
+    def save(self, data):
+        if isinstance(data, PointCache):
+            # Points are only built for the frame being written
+            self.frame_loader = data.frame_points
+            data = data.to_dict(points=False)
+        self.point_formats = self.attribute_float_formats(data.get("header", {}))
+        with open_output(self.file_path, 'w', 1 << 20, self.stats) as file:
+            self.stream = file
+            try:
+                self.frame_count = 0
+                with phase(self.stats, "encode"):
+                    self.write_value(data, 0)
+            finally:
+                self.stream = None
+
+    def attribute_float_formats(self, header):
+        # The float32 text only holds the values of float32 attributes, float64 attributes keep every digit
+        if self.float_format is float_repr or not isinstance(header, dict):
+            return []
+        types = header.get("attrib_data_type", [])[:header.get("num_attrib", 0)]
+        return [float32_repr if data_type == HBJSONEncoder.MarkerTypeFloat32 else float_repr for data_type in types]
+
+    def write(self, text):
+        self.stream.write(text)
+
+    def format_scalar(self, value, float_format=None):
+        if isinstance(value, float):
+            return (float_format or self.float_format)(value)
+        return json.dumps(value)
+
+    def write_value(self, value, level, float_format=None):
+        if isinstance(value, dict):
+            self.write_object(value, level)
+        elif isinstance(value, list):
+            self.write_list(value, level, float_format)
+        else:
+            self.write(self.format_scalar(value, float_format))
+
+    def write_object(self, obj, level):
+        if not obj:
+            self.write("{}")
+            return
+
+        inner = "\n" + self.indent * (level + 1)
+        separator = "{" + inner
+        for key, value in obj.items():
+            self.write(separator + json.dumps(str(key)) + ": ")
+            if key == "frame_data":
+                self.write_frames_data(value, level + 1)
+            else:
+                self.write_value(value, level + 1)
+            separator = "," + inner
+        self.write("\n" + self.indent * level + "}")
+
+    def write_list(self, lst, level, float_format=None):
+        if not lst:
+            self.write("[]")
+            return
+
+        inner = "\n" + self.indent * (level + 1)
+        separator = "[" + inner
+        for item in lst:
+            self.write(separator)
+            self.write_value(item, level + 1, float_format)
+            separator = "," + inner
+        self.write("\n" + self.indent * level + "]")
+
+    def write_frames_data(self, frames_data, level):
+        if frames_data is None and self.frame_loader is not None:
+            frames_data = self.frame_loader(self.frame_count)
+        self.frame_count += 1
+        if not frames_data:
+            self.write_value(frames_data, level)
+            return
+
+        inner = "\n" + self.indent * (level + 1)
+        separator = "[" + inner
+        for point in frames_data:
+            self.write(separator)
+            self.write_point(point, level + 1)
+            separator = "," + inner
+        self.write("\n" + self.indent * level + "]")
+
+    def point_format(self, i):
+        return self.point_formats[i] if i < len(self.point_formats) else self.float_format
+
+    def write_point(self, point, level):
+        if not self.compact:
+            if not point:
+                self.write("[]")
+                return
+            inner = "\n" + self.indent * (level + 1)
+            separator = "[" + inner
+            for i, attribute in enumerate(point):
+                self.write(separator)
+                self.write_value(attribute, level + 1, self.point_format(i))
+                separator = "," + inner
+            self.write("\n" + self.indent * level + "]")
+            return
+
+        # One line per point record
+        self.write("[" + ", ".join(
+            "[" + ", ".join(self.point_format(i)(item) if isinstance(item, float) else json.dumps(item) for item in attribute) + "]"
+            for i, attribute in enumerate(point)
+        ) + "]")
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+STREAM_TYPES = (ObjectStream, ArrayStream)
+
+def materialize(value):
+    if isinstance(value, ObjectStream):
+        return {key: materialize(item) for key, item in value.items()}
+    if isinstance(value, ArrayStream):
+        return [materialize(item) for item in value]
+    return value
+
+class HoudiniPointCacheReaderJSON:
+    def __init__(self, file_path, chunk_size=1 << 20, stats=None):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.stats = stats
+        if stats is not None:
+            # Only wrapped when enabled, read_value runs once per point record
+            self.read_value = stats.wrap(self.read_value, "parse")
+        self.stream = None
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def load(self):
+        self.stream = open(self.file_path, 'r')
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.expect("{")
+        return ObjectStream(self.read_object_items())
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def fill(self):
+        # Drop what has been parsed already, the buffer only holds the value being read
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        with phase(self.stats, "read"):
+            chunk = self.stream.read(self.chunk_size)
+        if self.stats is not None:
+            self.stats.add("bytes_read", len(chunk))
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+        return bool(chunk)
+
+    def next_char(self):
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError(f"Unexpected end of JSON document in {self.file_path}")
+
+    def expect(self, chars):
+        char = self.next_char()
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} but found {char!r} in {self.file_path}")
+        self.position += 1
+        return char
+
+    def read_value(self):
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number cut by the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def read_nested(self):
+        char = self.next_char()
+        if char == "{":
+            self.position += 1
+            return ObjectStream(self.read_object_items())
+        if char == "[":
+            self.position += 1
+            if self.next_char() in "{[":
+                return ArrayStream(self.read_array_items())
+            # Objects met later in the array are built before the next item is read
+            return [materialize(item) for item in self.read_array_items()]
+        return self.read_value()
+
+    def read_object_items(self):
+        if self.next_char() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key but found {key!r} in {self.file_path}")
+            self.expect(":")
+            value = self.read_nested()
+            yield key, value
+            if isinstance(value, STREAM_TYPES):
+                value.drain()
+            if self.expect(",}") == "}":
+                return
+
+    def read_array_items(self):
+        if self.next_char() == "]":
+            self.position += 1
+            return
+        while True:
+            if self.next_char() == "{":
+                self.position += 1
+                item = ObjectStream(self.read_object_items())
+                yield item
+                item.drain()
+            else:
+                yield self.read_value()
+            if self.expect(",]") == "]":
+                return
@@ -0,0 +1,13 @@
+import sys
+import multiprocessing
+from HBJSON_Service import forward_request
+
+# Entry point of the executable. The arguments are forwarded to a running conversion service
+# before the converter and NumPy are imported, and only converted here when no service answers.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    code = forward_request(sys.argv[1:])
+    if code is None:
+        from HBJSON_Trasncoder import main
+        code = main()
+    sys.exit(code)
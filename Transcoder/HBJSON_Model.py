@@ -0,0 +1,147 @@
+from array import array
+from itertools import chain
+from HBJSON_Codec import ArrayStream, HBJSONEncoder, TYPE_CODES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# array.array has no bool type, bool values are stored as bytes
+ARRAY_CODES = {code: 'B' if code == '?' else code for code in TYPE_CODES.values()}
+
+def array_column(values, code):
+    return array(ARRAY_CODES[code], values)
+
+def column_bytes(column, code):
+    # Native bytes of a column in the width of its declared type
+    if isinstance(column, array) and column.typecode == ARRAY_CODES[code]:
+        return column.tobytes()
+    if np is not None and isinstance(column, np.ndarray):
+        return np.ascontiguousarray(column, dtype=code).tobytes()
+    return array_column(column, code).tobytes()
+
+class Frame:
+    __slots__ = ("number", "time", "num_points", "columns")
+
+    def __init__(self, number, time, num_points, columns):
+        self.number = number
+        self.time = time
+        self.num_points = num_points
+        # One array per attribute, an array.array of num_points * size values or a (num_points, size) NumPy array
+        self.columns = columns
+
+    def view(self, i):
+        return memoryview(self.columns[i])
+
+    def points(self, sizes, codes):
+        # Legacy shape, a list of points holding a list of values per attribute
+        attributes = []
+        for column, size, code in zip(self.columns, sizes, codes):
+            if np is not None and isinstance(column, np.ndarray):
+                attributes.append(column.reshape(self.num_points, size).tolist())
+                continue
+            values = [bool(value) for value in column] if code == '?' else column.tolist()
+            attributes.append([values[k:k + size] for k in range(0, size * self.num_points, size)])
+        if not attributes:
+            return [[] for _ in range(self.num_points)]
+        return [list(point) for point in zip(*attributes)]
+
+class PointCache:
+    __slots__ = ("header", "frames")
+
+    def __init__(self, header, frames):
+        self.header = header
+        self.frames = frames
+
+    def __repr__(self):
+        return f"<PointCache {self.num_attrib} attributes, {len(self.frames)} frames>"
+
+    @property
+    def num_attrib(self):
+        return self.header.get("num_attrib", 0)
+
+    @property
+    def names(self):
+        return self.header.get("attrib_name", [])[:self.num_attrib]
+
+    @property
+    def sizes(self):
+        return self.header.get("attrib_size", [])[:self.num_attrib]
+
+    @property
+    def codes(self):
+        # None for the attributes of an unsupported type, they hold no values
+        return [TYPE_CODES.get(data_type) for data_type in self.header.get("attrib_data_type", [])[:self.num_attrib]]
+
+    def attribute_index(self, name):
+        if name not in self.names:
+            raise KeyError(f"Unknown attribute {name!r}")
+        return self.names.index(name)
+
+    def column(self, frame, name):
+        return self.frames[frame].columns[self.attribute_index(name)]
+
+    def frame_points(self, i):
+        return self.frames[i].points(self.sizes, self.codes)
+
+    @classmethod
+    def from_dict(cls, data):
+        header = data["header"]
+        cache = cls(header, [])
+        for frame in data["cache_data"]["frames"]:
+            num_points = frame.get("num_points", len(frame["frame_data"]))
+            columns = []
+            for i, code in enumerate(cache.codes):
+                values = chain.from_iterable(point[i] for point in frame["frame_data"])
+                columns.append(array_column(values, code) if code is not None else array('f'))
+            cache.frames.append(Frame(frame.get("number", 0), frame.get("time", 0), num_points, columns))
+        return cache
+
+    def to_dict(self, points=True):
+        # frame_data is left to None when points is False, to be filled one frame at a time
+        frames = []
+        for i, frame in enumerate(self.frames):
+            frames.append({
+                "number": frame.number,
+                "time": frame.time,
+                "num_points": frame.num_points,
+                "frame_data": self.frame_points(i) if points else None,
+            })
+        return {"header": self.header, "cache_data": {"frames": frames}}
+
+    def layout(self):
+        # (attribute index, code, first byte, width) of the attributes stored in a point record
+        layout = []
+        offset = 1
+        for i, (code, size) in enumerate(zip(self.codes, self.sizes)):
+            if code is not None and size > 0:
+                width = array(ARRAY_CODES[code]).itemsize * size
+                layout.append((i, code, offset, width))
+                offset += width
+        return layout, offset + 1
+
+    def pack_frame(self, frame):
+        # Interleaves the columns into point records, one strided copy per byte of the record
+        layout, point_size = self.layout()
+        records = bytearray(point_size * frame.num_points)
+        records[0::point_size] = bytes((HBJSONEncoder.MarkerArrayStart,)) * frame.num_points
+        records[point_size - 1::point_size] = bytes((HBJSONEncoder.MarkerArrayEnd,)) * frame.num_points
+        for i, code, offset, width in layout:
+            values = column_bytes(frame.columns[i], code)
+            for j in range(width):
+                records[offset + j::point_size] = values[j::width]
+        return records
+
+    def packed_frames(self):
+        for frame in self.frames:
+            yield {
+                "number": frame.number,
+                "time": frame.time,
+                "num_points": frame.num_points,
+                "frame_data": self.pack_frame(frame),
+            }
+
+    def encodable(self):
+        # Shape written by HBJSONEncoder, each frame is packed only when it is reached
+        return {"header": self.header, "cache_data": {"frames": ArrayStream(self.packed_frames())}}
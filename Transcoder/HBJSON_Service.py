@@ -0,0 +1,126 @@
+import io
+import os
+import sys
+import json
+import queue
+import tempfile
+import threading
+from contextlib import redirect_stdout, redirect_stderr
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+# A single conversion service runs per user. Its loopback address and the key clients authenticate with
+# are published in SERVICE_FILE, in the user's temporary directory, readable by the user only.
+SERVICE_FILE = os.path.join(tempfile.gettempdir(), "HBJSON_Transcoder.service")
+IDLE_TIMEOUT = 600
+
+# Commands that run for long in the process that started them, they are never forwarded
+LOCAL_COMMANDS = ("serve", "sync")
+
+def read_service_file():
+    try:
+        with open(SERVICE_FILE, 'r') as file:
+            info = json.load(file)
+        return tuple(info["address"]), bytes.fromhex(info["authkey"]), info["pid"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def forward_request(argv):
+    # Returns the exit code of the request run by the service, or None when no service answered
+    if "--no-service" in argv or (argv and argv[0] in LOCAL_COMMANDS):
+        return None
+    info = read_service_file()
+    if info is None:
+        return None
+
+    address, authkey, _ = info
+    try:
+        connection = Client(address, authkey=authkey)
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    with connection:
+        try:
+            connection.send((os.getcwd(), argv))
+            code, output = connection.recv()
+        except (OSError, EOFError):
+            return None
+    sys.stdout.write(output)
+    return code
+
+def exit_code(code):
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+class ConversionService:
+    # Runs the requests of later launches one at a time in this process, handler(argv) returns their exit code
+    def __init__(self, handler, idle_timeout=IDLE_TIMEOUT):
+        self.handler = handler
+        self.idle_timeout = idle_timeout
+        self.authkey = os.urandom(32)
+        self.listener = Listener(('127.0.0.1', 0), authkey=self.authkey)
+        self.connections = queue.Queue()
+
+    def publish(self):
+        info = {"address": list(self.listener.address), "authkey": self.authkey.hex(), "pid": os.getpid()}
+        temp_path = f"{SERVICE_FILE}.{os.getpid()}"
+        with open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as file:
+            json.dump(info, file)
+        os.replace(temp_path, SERVICE_FILE)
+
+    def unpublish(self):
+        # A service started later may have replaced the file, it is left to that service
+        info = read_service_file()
+        if info is not None and info[2] == os.getpid():
+            try:
+                os.remove(SERVICE_FILE)
+            except OSError:
+                pass
+
+    def accept(self):
+        while True:
+            try:
+                self.connections.put(self.listener.accept())
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue
+            except OSError:
+                return
+
+    def serve(self):
+        self.publish()
+        print(f"Waiting for more files, the service stops after {self.idle_timeout:g}s without a request.")
+        threading.Thread(target=self.accept, daemon=True).start()
+        try:
+            while True:
+                try:
+                    connection = self.connections.get(timeout=self.idle_timeout)
+                except queue.Empty:
+                    break
+                with connection:
+                    self.handle(connection)
+        finally:
+            self.listener.close()
+            self.unpublish()
+
+    def handle(self, connection):
+        try:
+            cwd, argv = connection.recv()
+        except (OSError, EOFError):
+            return
+
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            try:
+                os.chdir(cwd)
+                code = exit_code(self.handler(argv))
+            except SystemExit as e:
+                code = exit_code(e.code)
+            except Exception as e:
+                print(f"{type(e).__name__}: {e}")
+                code = 1
+        sys.stdout.write(output.getvalue())
+
+        try:
+            connection.send((code, output.getvalue()))
+        except OSError:
+            pass
@@ -0,0 +1,115 @@
+import io
+import time
+import tracemalloc
+from contextlib import nullcontext, contextmanager
+
+NO_PHASE = nullcontext()
+
+PHASES = ("read", "parse", "decode", "encode", "write")
+
+class ConversionStats:
+    # Wall time of each phase is exclusive, a nested phase pauses the one it runs in
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.times = {}
+        self.counters = {}
+        self.stack = []
+        self.switched = 0.0
+        self.started = None
+        self.total = 0.0
+        self.peak_memory = None
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        else:
+            self.trace_memory = False
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.total += time.perf_counter() - self.started
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def charge(self, now):
+        if self.stack:
+            name = self.stack[-1]
+            self.times[name] = self.times.get(name, 0.0) + now - self.switched
+        self.switched = now
+
+    @contextmanager
+    def phase(self, name):
+        self.charge(time.perf_counter())
+        self.stack.append(name)
+        try:
+            yield
+        finally:
+            self.charge(time.perf_counter())
+            self.stack.pop()
+
+    def wrap(self, function, name):
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return timed
+
+    def add(self, counter, amount):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "phases": dict(self.times),
+            "counters": dict(self.counters),
+            "peak_memory": self.peak_memory,
+        }
+
+    def report(self, title):
+        lines = [f"Stats for {title}:"]
+        names = list(PHASES) + [name for name in self.times if name not in PHASES]
+        for name in names:
+            if name in self.times:
+                share = self.times[name] / self.total * 100 if self.total else 0.0
+                lines.append(f"  {name:<10} {self.times[name]:>9.4f}s {share:>5.1f}%")
+        lines.append(f"  {'total':<10} {self.total:>9.4f}s")
+        for counter, value in self.counters.items():
+            lines.append(f"  {counter:<18} {value}")
+        if self.total:
+            moved = self.counters.get("bytes_read", 0) + self.counters.get("bytes_written", 0)
+            lines.append(f"  {'throughput':<18} {moved / self.total / 1e6:.1f} MB/s")
+        if self.peak_memory is not None:
+            lines.append(f"  {'peak_memory':<18} {self.peak_memory / 1e6:.1f} MB")
+        return "\n".join(lines)
+
+def phase(stats, name):
+    return NO_PHASE if stats is None else stats.phase(name)
+
+class TimedRawWriter(io.RawIOBase):
+    # Charges the writes that reach the disk to the "write" phase
+    def __init__(self, raw, stats):
+        self.raw = raw
+        self.stats = stats
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        with self.stats.phase("write"):
+            written = self.raw.write(data)
+        self.stats.add("bytes_written", written)
+        return written
+
+    def close(self):
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+def open_output(file_path, mode, buffering, stats):
+    if stats is None:
+        return open(file_path, mode, buffering=buffering)
+
+    writer = io.BufferedWriter(TimedRawWriter(open(file_path, 'wb', buffering=0), stats), buffering)
+    if 'b' in mode:
+        return writer
+    return io.TextIOWrapper(writer)
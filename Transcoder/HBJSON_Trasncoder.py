@@ -1,13 +1,46 @@
-import struct
+import io
 import json
+import struct
 import sys
 import os
+import mmap
+import glob
+import time
+import argparse
+import cProfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from collections import namedtuple
+from HBJSON_Codec import HBJSONEncoder, TYPE_CODES, TYPE_NAMES, narrow_schema, point_layout, point_dtype, decode_points
+from HBJSON_Json import HoudiniPointCacheWriterJSON, HoudiniPointCacheReaderJSON, FLOAT_FORMATS
+from HBJSON_Stats import ConversionStats, phase, open_output
+from HBJSON_Model import PointCache, Frame, array_column
+from HBJSON_Container import CONTAINER_MAGIC, CONTAINER_EXTENSION, COMPRESSIONS, is_container, pack_container, expand_container
+from HBJSON_Service import ConversionService, IDLE_TIMEOUT, forward_request
+from HBJSON_Index import ConversionIndex, scan_folder
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Location of one frame's point block, as found by the structural scan of a lazy load
+FrameIndexEntry = namedtuple("FrameIndexEntry", ["number", "time", "offset", "num_points"])
 
 class HoudiniPointCacheLoaderBJSON:
-    def __init__(self, file_path):
+    def __init__(self, file_path, use_numpy=True, as_arrays=False, lazy=False, attributes=None, stats=None):
         self.file_path = file_path
+        self.stats = stats
         self.reader = None
         self.position = 0
+        self.use_numpy = use_numpy and np is not None
+        self.as_arrays = as_arrays
+        # Names of the attributes to decode, in the order they are returned, None decodes them all
+        self.attributes = attributes
+        self.selection = None
+        self.lazy = lazy
 
         # Marker definitions
         self.markers = {
@@ -18,6 +51,9 @@ class HoudiniPointCacheLoaderBJSON:
             "array_start": ord(b'['), "array_end": ord(b']')
         }
 
+        # struct/NumPy codes of the attribute types decoded from frame_data
+        self.type_codes = TYPE_CODES
+
         self.headers = {
             "uint32": ["num_samples", "num_frames", "num_points", "number", "time"],
             "uint16": ["num_attrib"],
@@ -33,19 +69,136 @@ class HoudiniPointCacheLoaderBJSON:
         self.attrib_size = []
         self.attrib_type = []
 
+        # Offset table filled while scanning the frames of a lazy load
+        self.frame_index = []
+        self.frame_number = 0
+        self.frame_time = 0
+
     def load(self):
-        with open(self.file_path, 'rb') as file:
-            self.reader = file.read()
+        with phase(self.stats, "read"):
+            if self.lazy:
+                self.reader = self.map_file()
+            else:
+                with open(self.file_path, 'rb') as file:
+                    self.reader = file.read()
         
         if not self.reader:
             print("Failed to read file.")
             return False
 
+        if self.stats is not None:
+            self.stats.add("bytes_read", len(self.reader))
+
+        if is_container(self.reader):
+            # Compressed containers are expanded in memory to the .hbjson bytes they were packed from
+            with phase(self.stats, "decode"):
+                expanded = expand_container(self.reader)
+            self.close()
+            self.reader = expanded
+
         if self.read_marker() != self.markers["object_start"]:
             print("Invalid file format.")
             return False
 
-        return self.read_object()
+        with phase(self.stats, "parse"):
+            data = self.read_object()
+
+        if self.attributes is not None and isinstance(data.get("header"), dict):
+            self.project_header(data["header"])
+        return data
+
+    def load_model(self):
+        # Frames are read as one array per attribute, without the nested point lists
+        self.lazy = True
+        data = self.load()
+        if data is False:
+            return False
+
+        frames = []
+        for entry in self.frame_index:
+            self.position = entry.offset
+            columns = self.read_model_columns(entry.num_points)
+            if columns is False:
+                return False
+            frames.append(Frame(entry.number, entry.time, entry.num_points, columns))
+        return PointCache(data["header"], frames)
+
+    def read_model_columns(self, num_points):
+        layout = self.attribute_layout()
+        point_size = self.point_size(layout)
+        block_size = point_size * num_points
+        if self.position + block_size > len(self.reader):
+            raise EOFError("End of file reached.")
+
+        with phase(self.stats, "decode"):
+            if self.use_numpy:
+                columns = self.decode_points_numpy(layout, num_points)
+                if columns is not False:
+                    # Contiguous copies, the mapping can be closed once the model is built
+                    columns = [np.ascontiguousarray(column) for column in columns]
+            else:
+                columns = self.decode_columns_array(layout, num_points, point_size)
+        self.position += block_size
+
+        if self.stats is not None:
+            self.stats.add("frames", 1)
+            self.stats.add("points", num_points)
+        return columns
+
+    def decode_columns_array(self, layout, num_points, point_size):
+        # Each byte of an attribute is gathered from every record with one strided copy
+        block = bytes(self.reader[self.position:self.position + point_size * num_points])
+        if block[0::point_size] != bytes((self.markers["array_start"],)) * num_points or block[point_size - 1::point_size] != bytes((self.markers["array_end"],)) * num_points:
+            print("Invalid file format.")
+            return False
+
+        decoded = {}
+        for (i, code, size), (offset, width) in zip(layout, self.attribute_offsets(layout)):
+            values = bytearray(width * num_points)
+            for j in range(width):
+                values[j::width] = block[offset + j::point_size]
+            column = array_column([], code)
+            column.frombytes(values)
+            decoded[i] = column
+        return [decoded[i] if i in decoded else array_column([], 'f') for i in self.attribute_selection()]
+
+    def map_file(self):
+        with open(self.file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if isinstance(self.reader, mmap.mmap):
+            self.reader.close()
+        self.reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def find_frame(self, number):
+        for i, entry in enumerate(self.frame_index):
+            if entry.number == number:
+                return i
+        return None
+
+    def load_frame(self, i):
+        entry = self.frame_index[i]
+        self.position = entry.offset
+        columns = self.read_frame_columns(entry.num_points)
+        if columns is False:
+            return False
+
+        if self.as_arrays:
+            # Copy out of the mapping so close() is not blocked by live views
+            return [column.copy() for column in columns] if self.use_numpy else columns
+        return self.columns_to_points(columns, entry.num_points)
+
+    def load_frames(self, start=0, stop=None):
+        return [self.load_frame(i) for i in range(len(self.frame_index))[start:stop]]
     
     def read_marker(self):
         return self.read_next_byte()
@@ -88,10 +241,24 @@ class HoudiniPointCacheLoaderBJSON:
             return self.read_uint16()
         if key == "frame_data":
             return self.read_frames_data()
+        if key in self.headers["type_list"]:
+            return self.read_type_list()
 
         marker = self.read_marker()
         return self.parse_marker(marker)
 
+    def read_type_list(self):
+        # Type markers are stored as raw bytes, uint8 would otherwise read as the start of a string
+        if self.read_marker() != self.markers["array_start"]:
+            print("Invalid file format.")
+            return False
+        types = []
+        while True:
+            marker = self.read_marker()
+            if marker == self.markers["array_end"]:
+                return types
+            types.append(marker)
+
     def parse_marker(self, marker):
         if marker == self.markers["uint8"]:
             return self.read_uint8_string()
@@ -116,19 +283,162 @@ class HoudiniPointCacheLoaderBJSON:
             self.attrib_size = value
         elif key == "attrib_data_type":
             self.attrib_type = value
+        elif key == "number":
+            self.frame_number = value
+        elif key == "time":
+            self.frame_time = value
     
     def read_frames_data(self):
         if self.read_marker() != self.markers["array_start"]:
             print("Invalid file format.")
             return False
         
-        frame_data = [self.read_frame() for _ in range(self.num_points)]
-        
+        if self.lazy:
+            return self.index_frames_data()
+
+        columns = self.read_frame_columns(self.num_points)
+        if columns is False:
+            return False
+
         if self.read_marker() != self.markers["array_end"]:
             print("Invalid file format.")
             return False
-        
-        return frame_data
+
+        if self.as_arrays:
+            return columns
+        return self.columns_to_points(columns, self.num_points)
+
+    def index_frames_data(self):
+        entry = FrameIndexEntry(self.frame_number, self.frame_time, self.position, self.num_points)
+        self.position += self.point_size(self.attribute_layout()) * self.num_points
+
+        if self.read_marker() != self.markers["array_end"]:
+            print("Invalid file format.")
+            return False
+
+        self.frame_index.append(entry)
+        return None
+
+    def attribute_selection(self):
+        # Indices of the decoded attributes, resolved from their names once the header has been read
+        if self.selection is None:
+            names = self.attrib_name[:self.num_attrib]
+            if self.attributes is None:
+                self.selection = list(range(self.num_attrib))
+            else:
+                for name in self.attributes:
+                    if name not in names:
+                        raise ValueError(f"Unknown attribute {name!r} in {self.file_path}")
+                    if self.attributes.count(name) > 1:
+                        raise ValueError(f"Attribute {name!r} is selected more than once")
+                self.selection = [names.index(name) for name in self.attributes]
+        return self.selection
+
+    def project_header(self, header):
+        # The header describes the decoded attributes only, so the loaded data can be saved as it is
+        selection = self.attribute_selection()
+        header["num_attrib"] = len(selection)
+        for key in ["attrib_name", "attrib_size", "attrib_data_type"]:
+            if isinstance(header.get(key), list):
+                header[key] = [header[key][i] for i in selection if i < len(header[key])]
+
+    def attribute_layout(self):
+        # Attributes of unsupported types take no bytes, as in read_attribute
+        return point_layout(self.attrib_size[:self.num_attrib], self.attrib_type[:self.num_attrib])
+
+    def point_struct(self, layout, selected=None):
+        # Attributes left out of selected are skipped as pad bytes
+        parts = []
+        for i, code, size in layout:
+            if selected is None or i in selected:
+                parts.append(f"{size}{code}")
+            else:
+                parts.append(f"{struct.calcsize(code) * size}x")
+        return struct.Struct('=B' + ''.join(parts) + 'B')
+
+    def point_size(self, layout):
+        return self.point_struct(layout).size
+
+    def attribute_offsets(self, layout):
+        # (first byte, width) of each attribute inside a point record, after the record's start marker
+        offsets = []
+        offset = 1
+        for _, code, size in layout:
+            width = struct.calcsize(code) * size
+            offsets.append((offset, width))
+            offset += width
+        return offsets
+
+    def read_frame_columns(self, num_points):
+        layout = self.attribute_layout()
+        block_size = self.point_size(layout) * num_points
+        if self.position + block_size > len(self.reader):
+            raise EOFError("End of file reached.")
+
+        with phase(self.stats, "decode"):
+            if self.use_numpy:
+                columns = self.decode_points_numpy(layout, num_points)
+            else:
+                columns = self.decode_points_struct(layout, block_size)
+        self.position += block_size
+
+        if self.stats is not None:
+            self.stats.add("frames", 1)
+            self.stats.add("points", num_points)
+            self.stats.add("attribute_values", num_points * len(layout))
+        return columns
+
+    def projected_dtype(self, dtype, selection):
+        # Same record size and offsets, unselected attributes are strided past without being read
+        names = ["point_start"] + [f"attrib_{i}" for i in selection if f"attrib_{i}" in dtype.fields] + ["point_end"]
+        return np.dtype({
+            "names": names,
+            "formats": [dtype.fields[name][0] for name in names],
+            "offsets": [dtype.fields[name][1] for name in names],
+            "itemsize": dtype.itemsize,
+        })
+
+    def decode_points_numpy(self, layout, num_points):
+        selection = self.attribute_selection()
+        dtype = point_dtype(layout)
+        if self.attributes is not None:
+            dtype = self.projected_dtype(dtype, selection)
+        points = decode_points(self.reader, dtype, num_points, self.position)
+        if points is None:
+            print("Invalid file format.")
+            return False
+
+        columns = [np.empty((num_points, 0), dtype='f')] * len(selection)
+        for position, i in enumerate(selection):
+            if f"attrib_{i}" in dtype.fields:
+                columns[position] = points[f"attrib_{i}"]
+        return columns
+
+    def decode_points_struct(self, layout, block_size):
+        selection = self.attribute_selection()
+        selected = set(selection) if self.attributes is not None else None
+        point_struct = self.point_struct(layout, selected)
+        with memoryview(self.reader) as view:
+            records = list(point_struct.iter_unpack(view[self.position:self.position + block_size]))
+        if any(record[0] != self.markers["array_start"] or record[-1] != self.markers["array_end"] for record in records):
+            print("Invalid file format.")
+            return False
+
+        decoded = {}
+        offset = 1
+        for i, _, size in layout:
+            if selected is None or i in selected:
+                decoded[i] = [list(record[offset:offset + size]) for record in records]
+                offset += size
+        return [decoded[i] if i in decoded else [[] for _ in records] for i in selection]
+
+    def columns_to_points(self, columns, num_points):
+        with phase(self.stats, "decode"):
+            if self.use_numpy:
+                columns = [column.tolist() for column in columns]
+            if not columns:
+                return [[] for _ in range(num_points)]
+            return [list(point) for point in zip(*columns)]
     
     def read_frame(self):
         if self.read_marker() != self.markers["array_start"]:
@@ -148,10 +458,9 @@ class HoudiniPointCacheLoaderBJSON:
         attribute_size = self.attrib_size[i]
         attribute_value = []
         
-        if attribute_type == self.markers["int32"]:
-            attribute_value = [struct.unpack('i', self.read_next_bytes(4))[0] for _ in range(attribute_size)]
-        elif attribute_type == self.markers["float32"]:
-            attribute_value = [struct.unpack('f', self.read_next_bytes(4))[0] for _ in range(attribute_size)]
+        code = self.type_codes.get(attribute_type)
+        if code is not None and attribute_size > 0:
+            attribute_value = list(struct.unpack(f"={attribute_size}{code}", self.read_next_bytes(struct.calcsize(code) * attribute_size)))
         
         return attribute_value
     
@@ -168,128 +477,692 @@ class HoudiniPointCacheLoaderBJSON:
     def read_next_byte(self):
         return self.read_next_bytes(1)[0]
 
-class HoudiniPointCacheSaverBJSON:
-    def __init__(self, data, file_path):
+class HoudiniPointCacheInspectorBJSON(HoudiniPointCacheLoaderBJSON):
+    # Parses the header and frame fields only, point blocks are skipped by size and checked by their boundary markers
+    def __init__(self, file_path):
+        super().__init__(file_path, lazy=True)
+        self.container = False
+
+    def fail(self, message):
+        raise ValueError(f"{message} at byte {self.position}")
+
+    def read_frames_data(self):
+        if self.read_marker() != self.markers["array_start"]:
+            self.fail(f"Expected the start of the point records of frame {len(self.frame_index)}")
+
+        # The record size comes from the header, a header that is inconsistent is the first problem to report
+        self.check_schema()
+        entry = FrameIndexEntry(self.frame_number, self.frame_time, self.position, self.num_points)
+        point_size = self.point_size(self.attribute_layout())
+        end = self.position + point_size * self.num_points
+        if end >= len(self.reader):
+            self.fail(f"Frame {len(self.frame_index)} needs {point_size * self.num_points} bytes of point records but the file ends first")
+
+        # First and last records are enough to tell a layout that does not match the header
+        for offset in ([self.position, end - point_size] if self.num_points else []):
+            if self.reader[offset] != self.markers["array_start"] or self.reader[offset + point_size - 1] != self.markers["array_end"]:
+                self.position = offset
+                self.fail(f"Point record of frame {len(self.frame_index)} does not match the {point_size} bytes layout of the header")
+
+        self.position = end
+        if self.read_marker() != self.markers["array_end"]:
+            self.position -= 1
+            self.fail(f"Expected the end of the point records of frame {len(self.frame_index)}")
+
+        self.frame_index.append(entry)
+        return None
+
+    def check_schema(self):
+        for key, values in (("attrib_name", self.attrib_name), ("attrib_size", self.attrib_size), ("attrib_data_type", self.attrib_type)):
+            if len(values) < self.num_attrib:
+                raise ValueError(f"{key} lists {len(values)} attributes, num_attrib is {self.num_attrib}")
+        for i in range(self.num_attrib):
+            if self.attrib_size[i] > 0 and self.type_codes.get(self.attrib_type[i]) is None:
+                raise ValueError(f"Attribute {self.attrib_name[i]!r} has the unsupported data type {self.attrib_type[i]}")
+
+    def inspect(self):
+        report = {"path": self.file_path, "valid": False, "problem": None}
+        try:
+            self.reader = self.map_file()
+            if not self.reader:
+                raise ValueError("Empty file")
+            report["size"] = len(self.reader)
+
+            if is_container(self.reader):
+                self.container = True
+                expanded = expand_container(self.reader)
+                self.close()
+                self.reader = expanded
+
+            if self.read_marker() != self.markers["object_start"]:
+                self.position -= 1
+                self.fail("Expected the start of the root object")
+            data = self.read_object()
+            if self.position != len(self.reader):
+                self.fail(f"{len(self.reader) - self.position} unexpected bytes after the root object")
+
+            self.check_schema()
+            if len(self.frame_index) != self.num_frames:
+                raise ValueError(f"The header announces {self.num_frames} frames, the file holds {len(self.frame_index)}")
+            report["valid"] = True
+        except (ValueError, IndexError, EOFError, struct.error) as e:
+            if isinstance(e, (IndexError, EOFError)):
+                e = f"Unexpected end of file at byte {self.position}"
+            report["problem"] = str(e)
+            data = None
+
+        header = data.get("header") if isinstance(data, dict) else None
+        report["container"] = self.container
+        report["version"] = header.get("version") if isinstance(header, dict) else None
+        report["num_frames"] = self.num_frames
+        report["num_points"] = self.num_points
+        report["num_attrib"] = self.num_attrib
+
+        # Byte layout of a point record
+        attributes = []
+        layout = self.attribute_layout() if report["valid"] else []
+        for (i, code, size), (offset, width) in zip(layout, self.attribute_offsets(layout)):
+            attributes.append({"name": self.attrib_name[i], "type": TYPE_NAMES.get(self.attrib_type[i], str(self.attrib_type[i])), "size": size, "offset": offset, "width": width})
+        report["attributes"] = attributes
+        report["point_size"] = self.point_size(layout) if report["valid"] else None
+        report["frames"] = [entry._asdict() for entry in self.frame_index]
+        return report
+
+def inspect_file(input_path):
+    with HoudiniPointCacheInspectorBJSON(input_path) as inspector:
+        return inspector.inspect()
+
+def format_inspection(report, frames=False):
+    status = "OK" if report["valid"] else f"INVALID: {report['problem']}"
+    lines = [f"{report['path']}: {status}"]
+    if not report["valid"]:
+        return "\n".join(lines)
+
+    container = ", compressed container" if report["container"] else ""
+    lines.append(f"  version {report['version']}, {report['num_frames']} frames, {report['num_attrib']} attributes, {report['point_size']} bytes per point{container}")
+    lines.append(f"  {'attribute':<28} {'type':<8} {'size':>4} {'offset':>6} {'width':>5}")
+    for attribute in report["attributes"]:
+        lines.append(f"  {attribute['name']:<28} {attribute['type']:<8} {attribute['size']:>4} {attribute['offset']:>6} {attribute['width']:>5}")
+    if frames:
+        for i, frame in enumerate(report["frames"]):
+            lines.append(f"  frame {i}: number {frame['number']}, time {frame['time']}, {frame['num_points']} points at byte {frame['offset']}, {frame['num_points'] * report['point_size']} bytes")
+    return "\n".join(lines)
+
+PATCH_OPERATIONS = ("set", "scale", "offset")
+
+class HoudiniPointCachePatcherBJSON(HoudiniPointCacheLoaderBJSON):
+    # Edits attribute values in place, through a writable mapping of the file
+    def __init__(self, file_path, stats=None):
+        super().__init__(file_path, lazy=True, stats=stats)
+
+    def load(self):
+        if np is None:
+            print("Patching requires NumPy.")
+            return False
+        with open(self.file_path, 'rb') as file:
+            if is_container(file.read(len(CONTAINER_MAGIC))):
+                print(f"Compressed containers cannot be patched, expand {self.file_path} first.")
+                return False
+        return super().load()
+
+    def map_file(self):
+        with open(self.file_path, 'r+b') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE)
+
+    def attribute_index(self, name):
+        names = self.attrib_name[:self.num_attrib]
+        if name not in names:
+            raise ValueError(f"Unknown attribute {name!r} in {self.file_path}")
+        index = names.index(name)
+        if self.type_codes.get(self.attrib_type[index]) is None or self.attrib_size[index] == 0:
+            raise ValueError(f"Attribute {name!r} has no values to patch in {self.file_path}")
+        return index
+
+    def frame_points(self, entry, fields):
+        # Writable view of the given fields of a frame's records, the other bytes are strided past
+        layout = self.attribute_layout()
+        dtype = self.projected_dtype(point_dtype(layout), fields)
+        points = decode_points(self.reader, dtype, entry.num_points, entry.offset)
+        if points is None:
+            raise ValueError(f"Invalid point records in {self.file_path}")
+        return points
+
+    def patch(self, name, operation, value, ids=None, classes=None):
+        # value is a scalar or one value per component, ids and classes restrict the patched points
+        if operation not in PATCH_OPERATIONS:
+            raise ValueError(f"Unknown patch operation {operation!r}")
+        index = self.attribute_index(name)
+        fields = [index]
+        if ids is not None:
+            id_index = self.attribute_index("id")
+            fields.append(id_index)
+        if classes is not None:
+            class_index = self.attribute_index("class")
+            fields.append(class_index)
+
+        value = np.asarray(value, dtype=np.float64)
+        # Every frame is computed and checked before the first one is written, a failed patch leaves the file as it was
+        updates = []
+        try:
+            for entry in self.frame_index:
+                points = self.frame_points(entry, list(dict.fromkeys(fields)))
+                column = points[f"attrib_{index}"]
+
+                mask = np.ones(entry.num_points, dtype=bool)
+                if ids is not None:
+                    mask &= np.isin(points[f"attrib_{id_index}"][:, 0], ids)
+                if classes is not None:
+                    mask &= np.isin(points[f"attrib_{class_index}"][:, 0], classes)
+
+                selected = column[mask].astype(np.float64)
+                if operation == "set":
+                    selected = np.broadcast_to(value, selected.shape)
+                elif operation == "scale":
+                    selected = selected * value
+                else:
+                    selected = selected + value
+                if column.dtype.kind in 'iub':
+                    selected = np.rint(selected)
+                if column.dtype.kind in 'iu':
+                    # The upper bound is a power of two, exact as a float64 unlike the type's maximum
+                    bounds = np.iinfo(column.dtype)
+                    if not np.all((selected >= bounds.min) & (selected < bounds.max + 1)):
+                        raise ValueError(f"Patched values of attribute {name!r} do not fit its {column.dtype} type in {self.file_path}")
+                updates.append((entry, mask, selected))
+
+            patched = 0
+            for entry, mask, selected in updates:
+                column = self.frame_points(entry, [index])[f"attrib_{index}"]
+                column[mask] = selected
+                patched += int(mask.sum())
+        finally:
+            # Views into the mapping would keep it from closing
+            points = column = None
+
+        self.reader.flush()
+        return patched
+
+class HoudiniPointCacheSaverBJSON(HBJSONEncoder):
+    def __init__(self, data, file_path, flush_size=1 << 20, narrow=False, narrow_floats=False, stats=None):
+        super().__init__(flush_size=flush_size, stats=stats)
         self.data = data
         self.file_path = file_path
-        self.buffer = bytearray()
+        # Store integer attributes in the narrowest type holding their values, and exact float64 ones as float32
+        self.narrow = narrow
+        self.narrow_floats = narrow_floats
+        self.narrowed = []
 
-        # Marker definitions
-        self.MarkerTypeChar = ord(b'c')
-        self.MarkerTypeInt8 = ord(b'b')
-        self.MarkerTypeUInt8 = ord(b'B')
-        self.MarkerTypeBool = ord(b'?')
-        self.MarkerTypeInt16 = ord(b'h')
-        self.MarkerTypeUInt16 = ord(b'H')
-        self.MarkerTypeInt32 = ord(b'l')
-        self.MarkerTypeUInt32 = ord(b'L')
-        self.MarkerTypeInt64 = ord(b'q')
-        self.MarkerTypeUInt64 = ord(b'Q')
-        self.MarkerTypeFloat32 = ord(b'f')
-        self.MarkerTypeFloat64 = ord(b'd')
-        self.MarkerTypeString = ord(b's')
-        self.MarkerObjectStart = ord(b'{')
-        self.MarkerObjectEnd = ord(b'}')
-        self.MarkerArrayStart = ord(b'[')
-        self.MarkerArrayEnd = ord(b']')
+    def narrowed_data(self, data):
+        # Needs every value before the header is written, streamed data is saved as declared
+        if isinstance(data, PointCache) or not isinstance(data, dict) or not isinstance(data.get("header"), dict):
+            return data
+        types, self.narrowed = narrow_schema(data, self.narrow_floats)
+        data = dict(data)
+        data["header"] = dict(data["header"], attrib_data_type=types)
+        return data
 
     def save(self):
-        self.write_marker(self.MarkerObjectStart)
-        self.write_object(self.data)
-        self.write_marker(self.MarkerObjectEnd)
-
-        with open(self.file_path, 'wb') as file:
-            file.write(self.buffer)
-
-    def write_marker(self, marker):
-        self.buffer.append(marker)
-
-    def write_uint8_string(self, string):
-        self.buffer.append(len(string))
-        self.buffer.extend(string.encode('utf-8'))
-
-    def write_uint32(self, value):
-        self.buffer.extend(struct.pack('I', value))
-
-    def write_uint16(self, value):
-        self.buffer.extend(struct.pack('H', value))
-
-    def write_list(self, list_data):
-        self.write_marker(self.MarkerArrayStart)
-        for item in list_data:
-            if isinstance(item, str):
-                self.write_marker(self.MarkerTypeUInt8)
-                self.write_uint8_string(item)
-            elif isinstance(item, dict):
-                self.write_marker(self.MarkerObjectStart)
-                self.write_object(item)
-                self.write_marker(self.MarkerObjectEnd)
-            elif isinstance(item, list):
-                self.write_list(item)
-            else:
-                self.write_marker(item)
-
-        self.write_marker(self.MarkerArrayEnd)
-
-    def write_object(self, obj):
-        for key, value in obj.items():
-            self.write_marker(self.MarkerTypeUInt8)
-            self.write_uint8_string(key)
-
-            if isinstance(value, int):
-                if key in ["num_samples", "num_frames", "num_points", "number", "time"]:
-                    self.write_uint32(value)
-                elif key in ["num_attrib"]:
-                    self.write_uint16(value)
-            elif isinstance(value, list):
-                if key == "frame_data":
-                    self.write_frames_data(value)
-                else:
-                    self.write_list(value)
-            elif isinstance(value, dict):
-                self.write_marker(self.MarkerObjectStart)
-                self.write_object(value)
-                self.write_marker(self.MarkerObjectEnd)
-            else:
-                self.write_marker(self.MarkerTypeUInt8)
-                self.write_uint8_string(str(value))
-
-    def write_frames_data(self, frames_data):
-        self.write_marker(self.MarkerArrayStart)
-        for frame in frames_data:
-            self.write_marker(self.MarkerArrayStart)
-            for attribute in frame:
-                if all(isinstance(i, int) for i in attribute):
-                    for item in attribute:
-                        self.buffer.extend(struct.pack('i', item))
-                elif all(isinstance(i, float) for i in attribute):
-                    for item in attribute:
-                        self.buffer.extend(struct.pack('f', item))
-            self.write_marker(self.MarkerArrayEnd)
-        self.write_marker(self.MarkerArrayEnd)
-
-def convert_file(input_path):
+        data = self.narrowed_data(self.data) if self.narrow else self.data
+        if isinstance(data, PointCache):
+            data = data.encodable()
+        with open_output(self.file_path, 'wb', self.flush_size, self.stats) as file:
+            self.stream = file
+            try:
+                with phase(self.stats, "encode"):
+                    self.encode(data)
+            finally:
+                self.stream = None
+
+def print_narrowing(changes):
+    for name, data_type, narrower, applied in changes:
+        if applied:
+            print(f"Narrowed {name} from {TYPE_NAMES[data_type]} to {TYPE_NAMES[narrower]}")
+        else:
+            print(f"{name} is {TYPE_NAMES[data_type]} and could be stored as {TYPE_NAMES[narrower]} without loss")
+
+# Containers are read as the .hbjson files they were packed from
+SUPPORTED_EXTENSIONS = (".json", ".hbjson", CONTAINER_EXTENSION)
+
+def output_path_for(input_path):
     base, ext = os.path.splitext(input_path)
-    output_path = base + (".hbjson" if ext == ".json" else ".json")
+    return base + (".hbjson" if ext == ".json" else ".json")
 
-    if ext == ".json":
-        with open(input_path, 'r') as file:
-            data = json.load(file)
-        saver = HoudiniPointCacheSaverBJSON(data, output_path)
-        saver.save()
-    elif ext == ".hbjson":
-        loader = HoudiniPointCacheLoaderBJSON(input_path)
-        data = loader.load()
-        with open(output_path, 'w') as file:
-            json.dump(data, file, indent=4)
+def convert_file(input_path, compact=False, float_format="repr", attributes=None, narrow=False, narrow_floats=False, stats=False, profile=False, output_path=None):
+    # stats is True or a ConversionStats to fill, profile dumps a cProfile file next to the input
+    # input_path may also be a PointCache, written to output_path in the format of its extension
+    model = isinstance(input_path, PointCache)
+    if model:
+        if output_path is None:
+            print("An output path is required to save a PointCache.")
+            return None
+        ext = os.path.splitext(output_path)[1]
     else:
+        ext = os.path.splitext(input_path)[1]
+        output_path = output_path or output_path_for(input_path)
+
+    if ext not in SUPPORTED_EXTENSIONS or (model and ext == CONTAINER_EXTENSION):
         print(f"Unsupported file extension: {ext}")
-        return
+        return None
+
+    if stats is True:
+        stats = ConversionStats()
+    stats = stats or None
+    profiler = cProfile.Profile() if profile else None
+
+    if stats is not None:
+        stats.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        if model:
+            converted = convert_model(input_path, output_path, compact, float_format, stats)
+        elif ext == ".json":
+            converted = convert_json_file(input_path, output_path, narrow, narrow_floats, stats)
+        else:
+            converted = convert_hbjson_file(input_path, output_path, compact, float_format, attributes, stats)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(os.path.splitext(output_path if model else input_path)[0] + ".prof")
+        if stats is not None:
+            stats.stop()
+
+    if not converted:
+        print(f"Failed to convert {input_path}")
+        return None
 
     print(f"Converted {input_path} to {output_path}")
+    if stats is not None:
+        print(stats.report(input_path))
+    return output_path
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python converter.py <file_path>")
+def convert_model(cache, output_path, compact=False, float_format="repr", stats=None):
+    if os.path.splitext(output_path)[1] == ".hbjson":
+        HoudiniPointCacheSaverBJSON(cache, output_path, stats=stats).save()
+    else:
+        HoudiniPointCacheWriterJSON(output_path, compact=compact, float_format=float_format, stats=stats).save(cache)
+    return True
+
+def convert_json_file(input_path, output_path, narrow=False, narrow_floats=False, stats=None):
+    if narrow:
+        # Narrowing looks at every value before writing the header, the document is loaded whole
+        with phase(stats, "parse"):
+            with open(input_path, 'r') as file:
+                data = json.load(file)
+        saver = HoudiniPointCacheSaverBJSON(data, output_path, narrow=True, narrow_floats=narrow_floats, stats=stats)
+        saver.save()
+        print_narrowing(saver.narrowed)
+        return True
+
+    # Point records are parsed and encoded one at a time
+    with HoudiniPointCacheReaderJSON(input_path, stats=stats) as reader:
+        saver = HoudiniPointCacheSaverBJSON(reader.load(), output_path, stats=stats)
+        saver.save()
+    return True
+
+def convert_hbjson_file(input_path, output_path, compact=False, float_format="repr", attributes=None, stats=None):
+    # Frames are decoded one at a time while the JSON is streamed out
+    with HoudiniPointCacheLoaderBJSON(input_path, lazy=True, attributes=attributes, stats=stats) as loader:
+        data = loader.load()
+        if data is False:
+            return False
+        writer = HoudiniPointCacheWriterJSON(output_path, compact=compact, float_format=float_format, frame_loader=loader.load_frame, stats=stats)
+        writer.save(data)
+    return True
+
+def compress_file(input_path, compression="zlib"):
+    output_path = os.path.splitext(input_path)[0] + CONTAINER_EXTENSION
+    with HoudiniPointCacheLoaderBJSON(input_path, lazy=True) as loader:
+        if loader.load() is False:
+            print(f"Failed to compress {input_path}")
+            return None
+        layout = loader.attribute_layout()
+        frames = [(entry.offset, entry.num_points) for entry in loader.frame_index]
+        container = pack_container(loader.reader, frames, loader.point_size(layout), loader.attribute_offsets(layout), compression)
+        size = len(loader.reader)
+
+    with open(output_path, 'wb') as file:
+        file.write(container)
+    print(f"Compressed {input_path} to {output_path} ({len(container) / size:.1%} of {size} bytes)")
+    return output_path
+
+def expand_file(input_path):
+    output_path = os.path.splitext(input_path)[0] + ".hbjson"
+    with open(input_path, 'rb') as file:
+        data = file.read()
+    if not is_container(data):
+        print("Invalid file format.")
+        print(f"Failed to expand {input_path}")
+        return None
+
+    with open(output_path, 'wb') as file:
+        file.write(expand_container(data))
+    print(f"Expanded {input_path} to {output_path}")
+    return output_path
+
+def patch_file(input_path, attribute, operation, value, ids=None, classes=None):
+    with HoudiniPointCachePatcherBJSON(input_path) as patcher:
+        if patcher.load() is False:
+            print(f"Failed to patch {input_path}")
+            return None
+        patched = patcher.patch(attribute, operation, value, ids, classes)
+    print(f"Patched {attribute} of {patched} points in {input_path}")
+    return input_path
+
+def collect_input_files(paths, extensions=SUPPORTED_EXTENSIONS):
+    # Expands directories and glob patterns, explicit files are kept whatever their extension
+    # Paths that do not exist or match no file are returned with the reason as missing
+    files = []
+    missing = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [os.path.join(root, name) for root, _, names in os.walk(path) for name in sorted(names)]
+        elif os.path.isfile(path):
+            files.append(path)
+            continue
+        elif glob.has_magic(path):
+            matches = sorted(glob.glob(path, recursive=True))
+        else:
+            missing.append((path, "no such file or directory"))
+            continue
+        matches = [match for match in matches if os.path.isfile(match) and os.path.splitext(match)[1] in extensions]
+        if not matches:
+            missing.append((path, f"no {' or '.join(extensions)} file found"))
+        files += matches
+
+    unique_files = list(dict.fromkeys(os.path.normpath(file) for file in files))
+    return unique_files, missing
+
+def convert_task(input_path, options, function=convert_file, cwd=None):
+    # cwd is the directory relative paths were given in, the workers of a warm pool were started elsewhere
+    start = time.perf_counter()
+    try:
+        if cwd is not None:
+            os.chdir(cwd)
+        output_path = function(input_path, **options)
+        error = None if output_path else "conversion failed"
+    except Exception as e:
+        output_path = None
+        error = f"{type(e).__name__}: {e}"
+    return input_path, output_path, time.perf_counter() - start, error
+
+def pooled_task(input_path, options, function=convert_file, cwd=None):
+    # What a worker prints is returned with its result, to be printed by the process that started the batch
+    output = io.StringIO()
+    with redirect_stdout(output):
+        result = convert_task(input_path, options, function, cwd)
+    return result + (output.getvalue(),)
+
+# Pool kept warm by the conversion service, batches run on it instead of starting their own
+worker_pool = None
+
+def start_worker_pool(jobs=None):
+    global worker_pool
+    jobs = jobs or os.cpu_count() or 1
+    worker_pool = ProcessPoolExecutor(max_workers=jobs)
+    # Workers are started, and import the converter, before the first request
+    list(worker_pool.map(warm_worker, range(jobs)))
+
+def warm_worker(_):
+    return os.getpid()
+
+def convert_batch(input_paths, jobs=None, options=None, function=convert_file):
+    options = options or {}
+    jobs = min(jobs or os.cpu_count() or 1, len(input_paths))
+    if jobs <= 1:
+        return [convert_task(input_path, options, function) for input_path in input_paths]
+
+    results = {}
+    pool = worker_pool or ProcessPoolExecutor(max_workers=jobs)
+    try:
+        cwd = os.getcwd()
+        futures = {pool.submit(pooled_task, input_path, options, function, cwd): input_path for input_path in input_paths}
+        for future in as_completed(futures):
+            input_path = futures[future]
+            try:
+                *result, output = future.result()
+                sys.stdout.write(output)
+                results[input_path] = tuple(result)
+            except Exception as e:
+                # A worker that died takes its task down with it, not the batch
+                results[input_path] = (input_path, None, 0.0, f"{type(e).__name__}: {e}")
+    finally:
+        if pool is not worker_pool:
+            pool.shutdown()
+    return [results[input_path] for input_path in input_paths]
+
+# Options that change the output of a conversion, a synced file is converted again when they change
+OUTPUT_OPTIONS = ("compact", "float_format", "attributes", "narrow", "narrow_floats")
+
+def sync_folder(index, options, jobs=None, extensions=SUPPORTED_EXTENSIONS, retry_failed=True):
+    # Converts the new and changed sources of the index's folder, returns the results, the up to date count and the pruned sources
+    index.digests.clear()
+    sources = scan_folder(index.folder, extensions)
+    sources.pop(os.path.relpath(index.path, index.folder), None)
+
+    output_options = {name: options.get(name) for name in OUTPUT_OPTIONS}
+    changed = [source for source, stat in sources.items() if not index.is_up_to_date(source, stat, output_options, retry_failed)]
+    pruned = index.prune(sources, extensions)
+
+    # Hashes are taken before converting, a source edited meanwhile is converted again by the next sync
+    digests = [index.digest(source) for source in changed]
+    results = convert_batch([os.path.join(index.folder, source) for source in changed], jobs, options) if changed else []
+    for source, digest, (_, output_path, _, _) in zip(changed, digests, results):
+        index.record(source, sources[source], digest, output_options, output_path)
+    index.save()
+    return results, len(sources) - len(changed), pruned
+
+def print_batch_report(results):
+    failures = [result for result in results if result[3]]
+    total_time = sum(result[2] for result in results)
+    print()
+    print(f"{'Time (s)':>10}  File")
+    for input_path, _, elapsed, error in results:
+        print(f"{elapsed:>10.3f}  {input_path}" + (" [FAILED]" if error else ""))
+    print(f"Converted {len(results) - len(failures)} of {len(results)} files in {total_time:.3f}s of conversion time.")
+    if failures:
+        print("Failures:")
+        for input_path, _, _, error in failures:
+            print(f"  {input_path}: {error}")
+
+def finish_batch(results):
+    if len(results) != 1 or results[0][3]:
+        print_batch_report(results)
+    return 1 if any(result[3] for result in results) else 0
+
+def compress_main(argv):
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder compress", description=f"Pack .hbjson files into compressed {CONTAINER_EXTENSION} containers.")
+    parser.add_argument("paths", nargs="+", help=".hbjson files, directories or glob patterns to compress")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default="zlib", help="lzma is smaller and slower than zlib")
+    args = parser.parse_args(argv)
+
+    input_paths, missing = collect_input_files(args.paths, (".hbjson",))
+    results = [(path, None, 0.0, reason) for path, reason in missing]
+    results += convert_batch(input_paths, args.jobs, {"compression": args.compression}, compress_file)
+    return finish_batch(results)
+
+def expand_main(argv):
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder expand", description=f"Restore the exact .hbjson files packed in {CONTAINER_EXTENSION} containers.")
+    parser.add_argument("paths", nargs="+", help=f"{CONTAINER_EXTENSION} files, directories or glob patterns to expand")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    args = parser.parse_args(argv)
+
+    input_paths, missing = collect_input_files(args.paths, (CONTAINER_EXTENSION,))
+    results = [(path, None, 0.0, reason) for path, reason in missing]
+    results += convert_batch(input_paths, args.jobs, {}, expand_file)
+    return finish_batch(results)
+
+def patch_main(argv):
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder patch", description="Edit an attribute of .hbjson files in place, without converting them.")
+    parser.add_argument("paths", nargs="+", help=".hbjson files, directories or glob patterns to patch")
+    parser.add_argument("-a", "--attribute", required=True, help="name of the attribute to edit, e.g. pscale, Cd or P")
+    operations = parser.add_mutually_exclusive_group(required=True)
+    for operation in PATCH_OPERATIONS:
+        operations.add_argument(f"--{operation}", type=float, nargs="+", metavar="VALUE", help=f"{operation} the values, by one value or one per component")
+    parser.add_argument("--id", type=int, nargs="+", dest="ids", default=None, help="only patch the points with these ids")
+    parser.add_argument("--class", type=float, nargs="+", dest="classes", default=None, help="only patch the points of these classes")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    args = parser.parse_args(argv)
+
+    operation = next(operation for operation in PATCH_OPERATIONS if getattr(args, operation) is not None)
+    value = getattr(args, operation)
+    options = {"attribute": args.attribute, "operation": operation, "value": value[0] if len(value) == 1 else value, "ids": args.ids, "classes": args.classes}
+
+    input_paths, missing = collect_input_files(args.paths, (".hbjson",))
+    results = [(path, None, 0.0, reason) for path, reason in missing]
+    results += convert_batch(input_paths, args.jobs, options, patch_file)
+    return finish_batch(results)
+
+def sync_main(argv):
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder sync", description="Convert the new and changed point caches of folders, skipping the files converted by an earlier sync.")
+    parser.add_argument("folders", nargs="+", help="folders to synchronize, each with its own index")
+    parser.add_argument("--from", dest="source", choices=["json", "hbjson", "hbjz"], required=True, help="format of the source files, the other format is written next to them")
+    parser.add_argument("--index", default=None, help="path of the index, with a single folder (default: .hbjson_index in the folder)")
+    parser.add_argument("--watch", action="store_true", help="keep polling the folders and convert files as they change")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between two polls with --watch (default: 2)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    add_conversion_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.index and len(args.folders) > 1:
+        parser.error("--index can only be given with a single folder")
+
+    missing = [folder for folder in args.folders if not os.path.isdir(folder)]
+    for folder in missing:
+        print(f"No such directory: {folder}")
+    indexes = [ConversionIndex(folder, args.index).load() for folder in args.folders if folder not in missing]
+    options = conversion_options(args)
+
+    code = 1 if missing else 0
+    retry_failed = True
+    try:
+        while True:
+            for index in indexes:
+                start = time.perf_counter()
+                results, up_to_date, pruned = sync_folder(index, options, args.jobs, ("." + args.source,), retry_failed)
+                if results:
+                    code = max(code, finish_batch(results))
+                if results or pruned or not args.watch:
+                    failed = sum(1 for result in results if result[3])
+                    print(f"Synchronized {index.folder}: {len(results) - failed} converted, {failed} failed, {up_to_date} up to date, {len(pruned)} pruned in {time.perf_counter() - start:.3f}s.")
+            if not args.watch:
+                return code
+            # Files that failed are only tried again once they change
+            retry_failed = False
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return code
+
+def inspect_main(argv):
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder inspect", description="Print the schema and byte layout of point cache files and check their structure without decoding them.")
+    parser.add_argument("paths", nargs="+", help=f".hbjson or {CONTAINER_EXTENSION} files, directories or glob patterns to inspect")
+    parser.add_argument("--frames", action="store_true", help="list the number, time, size and offset of every frame")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    input_paths, missing = collect_input_files(args.paths, (".hbjson", CONTAINER_EXTENSION))
+    reports = [{"path": path, "valid": False, "problem": reason.capitalize()} for path, reason in missing]
+    reports += [inspect_file(input_path) for input_path in input_paths]
+
+    if args.json:
+        print(json.dumps(reports, indent=4))
     else:
-        convert_file(sys.argv[1])
\ No newline at end of file
+        for report in reports:
+            print(format_inspection(report, args.frames))
+        invalid = sum(not report["valid"] for report in reports)
+        if len(reports) > 1:
+            print(f"{len(reports) - invalid} of {len(reports)} files are valid.")
+    return 1 if any(not report["valid"] for report in reports) else 0
+
+def service_request(argv, jobs=None):
+    # A worker that died breaks the pool for every later request, it is replaced first
+    try:
+        worker_pool.submit(warm_worker, 0).result()
+    except BrokenProcessPool:
+        start_worker_pool(jobs)
+    return main(argv, single_instance=False)
+
+def serve(jobs=None, idle_timeout=IDLE_TIMEOUT):
+    # Later launches forward their arguments to this process and exit, see HBJSON_Launcher.py
+    start_worker_pool(jobs)
+    try:
+        ConversionService(lambda argv: service_request(argv, jobs), idle_timeout).serve()
+    finally:
+        worker_pool.shutdown()
+    return 0
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder serve", description="Run the conversion service that later launches forward their files to.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT, help=f"seconds without a request before the service stops (default: {IDLE_TIMEOUT})")
+    args = parser.parse_args(argv)
+    return serve(args.jobs, args.idle_timeout)
+
+def add_conversion_arguments(parser):
+    parser.add_argument("--compact", action="store_true", help="write each point record of a .json output on a single line")
+    parser.add_argument("--float-format", choices=FLOAT_FORMATS, default="repr", help="float32 writes the shortest text that reads back as the same float32")
+    parser.add_argument("--attributes", nargs="+", metavar="NAME", default=None, help="only write these attributes to .json outputs, in this order")
+    parser.add_argument("--narrow", action="store_true", help="store the integer attributes of .hbjson outputs in the narrowest type holding their values")
+    parser.add_argument("--narrow-floats", action="store_true", help="with --narrow, also store float64 attributes whose values are exact float32 as float32")
+    parser.add_argument("--stats", action="store_true", help="print per-phase timings, byte and point counts and peak memory of each conversion")
+    parser.add_argument("--profile", action="store_true", help="dump a cProfile file next to each input")
+
+def conversion_options(args):
+    return {"compact": args.compact, "float_format": args.float_format, "attributes": args.attributes, "narrow": args.narrow, "narrow_floats": args.narrow_floats, "stats": args.stats, "profile": args.profile}
+
+# Commands given as the first argument, anything else is converted
+COMMANDS = {
+    "inspect": inspect_main,
+    "compress": compress_main,
+    "expand": expand_main,
+    "patch": patch_main,
+    "serve": serve_main,
+    "sync": sync_main,
+}
+
+def main(argv=None, single_instance=None):
+    # single_instance keeps this process running as the conversion service once its own files are converted,
+    # by default only the frozen executable does, for drag-and-drop
+    argv = sys.argv[1:] if argv is None else argv
+    if single_instance is None:
+        single_instance = getattr(sys, "frozen", False)
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(prog="HBJSON_Transcoder", description="Two way converter for Houdini Point Cache files.")
+    parser.add_argument("paths", nargs="+", help=f".hbjson, {CONTAINER_EXTENSION} or .json files, directories or glob patterns to convert")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--from", dest="source", choices=["json", "hbjson", "hbjz"], default=None, help="only pick files of this format from directories and glob patterns")
+    add_conversion_arguments(parser)
+    parser.add_argument("--no-service", action="store_true", help="convert in this process, without forwarding the files to a running service or starting one")
+    args = parser.parse_args(argv)
+    options = conversion_options(args)
+
+    extensions = ("." + args.source,) if args.source else SUPPORTED_EXTENSIONS
+    input_paths, missing = collect_input_files(args.paths, extensions)
+    results = [(path, None, 0.0, reason) for path, reason in missing]
+
+    # Skip files whose output would overwrite another input of the same batch
+    outputs = {os.path.normcase(output_path_for(path)) for path in input_paths}
+    conflicts = [path for path in input_paths if os.path.normcase(path) in outputs]
+    input_paths = [path for path in input_paths if path not in conflicts]
+    results += [(path, None, 0.0, "output of another input in the batch") for path in conflicts]
+
+    # A container packed next to its .hbjson has the same output, only the .hbjson is converted
+    packed = {os.path.normcase(os.path.splitext(path)[0]) for path in input_paths if os.path.splitext(path)[1] == ".hbjson"}
+    for path in [path for path in input_paths if os.path.splitext(path)[1] == CONTAINER_EXTENSION and os.path.normcase(os.path.splitext(path)[0]) in packed]:
+        print(f"Skipping {path}, its .hbjson is converted instead")
+        input_paths.remove(path)
+
+    results += convert_batch(input_paths, args.jobs, options)
+    code = finish_batch(results)
+    if single_instance and not args.no_service:
+        serve(args.jobs)
+    return code
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    code = forward_request(sys.argv[1:])
+    sys.exit(main() if code is None else code)
\ No newline at end of file
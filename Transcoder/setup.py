@@ -3,7 +3,7 @@ from cx_Freeze import setup, Executable
 
 # Dependencies are automatically detected, but it might need fine tuning.
 build_exe_options = {
-    "packages": ["os", "struct", "json"],
+    "packages": ["os", "struct", "json", "mmap", "glob", "argparse", "multiprocessing", "concurrent.futures", "cProfile", "tracemalloc", "zlib", "lzma", "array", "queue", "threading", "tempfile", "hashlib"],
     "excludes": [],
 }
 
@@ -17,5 +17,6 @@ setup(
     version="1.2",
     description="Two Way Converter for Houdini Point Cache files",
     options={"build_exe": build_exe_options},
-    executables=[Executable("HBJSON_Trasncoder.py", base=base)],
+    # The launcher forwards dropped files to a running conversion service before importing the converter
+    executables=[Executable("HBJSON_Launcher.py", base=base, target_name="HBJSON_Trasncoder")],
 )